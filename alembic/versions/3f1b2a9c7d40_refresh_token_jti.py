@@ -0,0 +1,49 @@
+"""refresh token jti
+
+Revision ID: 3f1b2a9c7d40
+Revises: c621d287ceb3
+Create Date: 2026-10-19 12:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1b2a9c7d40"
+down_revision: Union[str, Sequence[str], None] = "c621d287ceb3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored tokens carry no jti claim and cannot be migrated: users log in again.
+    op.execute("DELETE FROM refresh_token")
+    op.drop_constraint(op.f("refresh_token_token_key"), "refresh_token", type_="unique")
+    op.drop_column("refresh_token", "token")
+    op.add_column(
+        "refresh_token", sa.Column("jti", sa.String(length=32), nullable=False)
+    )
+    op.create_unique_constraint(op.f("refresh_token_jti_key"), "refresh_token", ["jti"])
+    op.create_index(
+        op.f("ix_refresh_token_expires_at"),
+        "refresh_token",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM refresh_token")
+    op.drop_index(op.f("ix_refresh_token_expires_at"), table_name="refresh_token")
+    op.drop_constraint(op.f("refresh_token_jti_key"), "refresh_token", type_="unique")
+    op.drop_column("refresh_token", "jti")
+    op.add_column("refresh_token", sa.Column("token", sa.String(), nullable=False))
+    op.create_unique_constraint(
+        op.f("refresh_token_token_key"), "refresh_token", ["token"]
+    )
@@ -0,0 +1,42 @@
+"""resource versions for etags
+
+Revision ID: 7a4e9c2d1b85
+Revises: 3f1b2a9c7d40
+Create Date: 2026-10-19 19:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a4e9c2d1b85"
+down_revision: Union[str, Sequence[str], None] = "3f1b2a9c7d40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "projects",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "agent_session_requirements",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "agent_session_requirements",
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("agent_session_requirements", "updated_at")
+    op.drop_column("agent_session_requirements", "version")
+    op.drop_column("projects", "version")
@@ -0,0 +1,51 @@
+"""unique answer per question
+
+Revision ID: b5d3e8f2a614
+Revises: 7a4e9c2d1b85
+Create Date: 2026-10-19 20:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d3e8f2a614"
+down_revision: Union[str, Sequence[str], None] = "7a4e9c2d1b85"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Racing submits could store several answers for one question; the
+    # dialogue snapshot only ever showed the first, so keep that one.
+    op.execute(
+        """
+        DELETE FROM agent_session_messages a
+        USING agent_session_messages b
+        WHERE a.message_type = 'ANSWER'
+          AND b.message_type = 'ANSWER'
+          AND a.parent_message_id = b.parent_message_id
+          AND a.id > b.id
+        """
+    )
+    op.create_index(
+        "uq_agent_session_messages_answer_parent",
+        "agent_session_messages",
+        ["parent_message_id"],
+        unique=True,
+        postgresql_where=sa.text("message_type = 'ANSWER'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "uq_agent_session_messages_answer_parent",
+        table_name="agent_session_messages",
+        postgresql_where=sa.text("message_type = 'ANSWER'"),
+    )
@@ -0,0 +1,40 @@
+"""materialized dialogue snapshot of agent sessions
+
+Revision ID: d4a7c1e9f352
+Revises: b5d3e8f2a614
+Create Date: 2026-10-19 23:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a7c1e9f352"
+down_revision: Union[str, Sequence[str], None] = "b5d3e8f2a614"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing sessions keep a NULL snapshot until their next change;
+    # readers build it from the messages meanwhile.
+    op.add_column(
+        "agent_sessions",
+        sa.Column("snapshot", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.add_column(
+        "agent_sessions",
+        sa.Column("snapshot_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("agent_sessions", "snapshot_version")
+    op.drop_column("agent_sessions", "snapshot")
@@ -0,0 +1,49 @@
+"""last change of agent sessions for reconciliation
+
+Revision ID: e8b2f6a4c913
+Revises: d4a7c1e9f352
+Create Date: 2026-10-20 00:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b2f6a4c913"
+down_revision: Union[str, Sequence[str], None] = "d4a7c1e9f352"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "agent_sessions",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_agent_sessions_processing_updated_at",
+        "agent_sessions",
+        ["updated_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'PROCESSING'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_agent_sessions_processing_updated_at",
+        table_name="agent_sessions",
+        postgresql_where=sa.text("status = 'PROCESSING'"),
+    )
+    op.drop_column("agent_sessions", "updated_at")
@@ -0,0 +1,44 @@
+"""streamed final result chunks
+
+Revision ID: f3c9d5b7a208
+Revises: e8b2f6a4c913
+Create Date: 2026-10-20 01:05:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c9d5b7a208"
+down_revision: Union[str, Sequence[str], None] = "e8b2f6a4c913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "agent_session_result_chunks",
+        sa.Column("session_id", sa.Integer(), nullable=False),
+        sa.Column("chunk_index", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["session_id"], ["agent_sessions.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("session_id", "chunk_index"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("agent_session_result_chunks")
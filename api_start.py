@@ -1,15 +1,109 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import Optional
 import uvicorn
-from alembic import command
-from alembic.config import Config
 from app.core.config import settings
+from app.core.metrics import clear_multiprocess_dir
+from app.core.migrations import upgrade_to_head, check_schema_revision
 from app.main import app
 
-if __name__ == "__main__":
-    alembic_config = Config("alembic.ini")
-    command.upgrade(alembic_config, "head")
-    uvicorn.run(
-        "api_start:app",
-        host="0.0.0.0",
-        port=8080,
-        reload=settings.RELOAD,
+logger = logging.getLogger("api_start")
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    # The app is async and I/O bound: one event loop per core saturates the CPU,
+    # more workers only multiply DB pools (DB_POOL_SIZE + DB_MAX_OVERFLOW each).
+    return max(1, available_cpus())
+
+
+def share_metrics(workers: int) -> Optional[str]:
+    """Point every worker at one metrics directory, emptied for this run.
+
+    Returns the directory if it is a temporary one to remove on exit.
+    """
+    if workers < 2:
+        return None
+    path = settings.METRICS_MULTIPROCESS_DIR
+    if path:
+        clear_multiprocess_dir(path)
+    else:
+        path = tempfile.mkdtemp(prefix="rtf-metrics-")
+    # Workers are spawned and read their settings from the environment.
+    os.environ["METRICS_MULTIPROCESS_DIR"] = path
+    return None if settings.METRICS_MULTIPROCESS_DIR else path
+
+
+def check_worker_settings(workers: int) -> None:
+    """Refuse per-process backends that break with several workers."""
+    if workers < 2:
+        return
+    if settings.SESSION_EVENTS_BACKEND == "memory":
+        raise SystemExit(
+            "SESSION_EVENTS_BACKEND=memory only reaches streams on one worker; "
+            "use postgres or SERVER_WORKERS=1"
+        )
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        logger.warning(
+            "RATE_LIMIT_BACKEND=memory: each of %s workers enforces the full limits",
+            workers,
+        )
+
+
+def run_production() -> None:
+    workers = settings.SERVER_WORKERS or default_workers()
+    check_worker_settings(workers)
+    metrics_dir = share_metrics(workers)
+    max_db_connections = workers * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    logger.info(
+        "Starting %s workers on %s CPUs, up to %s database connections",
+        workers,
+        available_cpus(),
+        max_db_connections,
     )
+    try:
+        uvicorn.run(
+            "api_start:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=workers,
+            loop=settings.SERVER_LOOP,
+            http=settings.SERVER_HTTP,
+            backlog=settings.SERVER_BACKLOG,
+            timeout_keep_alive=settings.SERVER_KEEP_ALIVE_SECONDS,
+            timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+            proxy_headers=True,
+            access_log=settings.SERVER_ACCESS_LOG,
+            ws_ping_interval=settings.WS_HEARTBEAT_INTERVAL_SECONDS,
+            ws_ping_timeout=settings.WS_HEARTBEAT_TIMEOUT_SECONDS,
+        )
+    finally:
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    match settings.STARTUP_MIGRATIONS:
+        case "upgrade":
+            upgrade_to_head()
+        case "check":
+            check_schema_revision()
+    if settings.RELOAD:
+        uvicorn.run(
+            "api_start:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            reload=True,
+            ws_ping_interval=settings.WS_HEARTBEAT_INTERVAL_SECONDS,
+            ws_ping_timeout=settings.WS_HEARTBEAT_TIMEOUT_SECONDS,
+        )
+    else:
+        run_production()
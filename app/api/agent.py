@@ -8,16 +8,16 @@ from fastapi import (
     Request,
     Header,
     Path,
-    Query
+    Query,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import List, Optional
 from app import schemas
 from app.cruds import (
     AgentSessionsCRUD,
     AgentSessionMessageCRUD,
-    ProjectCRUD, AgentSessionRequirementCRUD,
+    ProjectCRUD,
 )
 from app.models import (
     User as UserORM,
@@ -27,20 +27,46 @@ from app.models import (
     SessionMessageRoleEnum,
     QuestionStatusEnum,
 )
-from app.dependencies import get_current_user, get_agent
+from app.dependencies import (
+    get_current_user,
+    get_current_read_user,
+    get_agent,
+    get_read_db,
+    authenticate_token,
+)
 from app.services import (
     handle_questions_webhook,
     handle_final_result_webhook,
+    handle_result_chunk_webhook,
     handle_error_webhook,
     handle_project_update_webhook,
-    AgentService, markdown_to_pdf, markdown_to_word,
+    AgentService,
+    markdown_to_pdf,
+    markdown_to_word,
+    session_events,
+    session_event_stream,
+    connection_manager,
+    load_snapshot,
+    load_snapshot_frame,
+    make_etag,
+    etag_matches,
 )
-from app.core.database import get_db, session as get_session_maker
+from app.utils.dialogue import dumps
+from app.core.config import settings
+from app.core.database import get_db, get_read_session_maker
+from app.core.metrics import webhook_processing_duration
+from app.core.tracing import tag_request
+from app.exceptions.custom import NotFoundException
 from pydantic import PositiveInt
+import asyncio
+import logging
+import orjson
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 ws_router = APIRouter(tags=["websocket"])
 
+logger = logging.getLogger(__name__)
+
 
 @router.post(
     "/webhook",
@@ -66,155 +92,319 @@ async def webhook_update_session(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="X-Request-ID header is required",
         )
-    print(payload.data)
-    match payload.event:
-        case SessionCallbackEnum.PROJECT_UPDATED:
-            await handle_project_update_webhook(request, payload.data, session)
-        case SessionCallbackEnum.QUESTIONS:
-            await handle_questions_webhook(request, payload.data, session)
-        case SessionCallbackEnum.FINAL_RESULT:
-            await handle_final_result_webhook(request, payload.data, session)
-        case SessionCallbackEnum.ERROR:
-            await handle_error_webhook(request, payload.data, session)
+    logger.info("Webhook %s received, request id %s", payload.event.value, x_request_id)
+    tag_request(x_request_id)
+    with webhook_processing_duration.time(event=payload.event.value):
+        match payload.event:
+            case SessionCallbackEnum.PROJECT_UPDATED:
+                await handle_project_update_webhook(request, payload.data, session)
+            case SessionCallbackEnum.QUESTIONS:
+                await handle_questions_webhook(request, payload.data, session)
+            case SessionCallbackEnum.FINAL_RESULT:
+                await handle_final_result_webhook(request, payload.data, session)
+            case SessionCallbackEnum.RESULT_CHUNK:
+                await handle_result_chunk_webhook(request, payload.data, session)
+            case SessionCallbackEnum.ERROR:
+                await handle_error_webhook(request, payload.data, session)
 
     return {"status": "ok", "request_id": x_request_id}
 
 
+def _bearer_token(websocket: WebSocket, token: Optional[str]) -> Optional[str]:
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials
+    # Browsers cannot set headers on a WebSocket handshake.
+    return token
+
+
+async def _authenticate_websocket(
+    websocket: WebSocket, token: Optional[str]
+) -> Optional[int]:
+    """User id behind the handshake's token; the socket is closed if there is none."""
+    credentials = _bearer_token(websocket, token)
+    if not credentials:
+        await websocket.close(code=1008, reason="Not authenticated")
+        return None
+    try:
+        async with get_read_session_maker()() as db_session:
+            user = await authenticate_token(db_session, credentials)
+            return user.id
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return None
+
+
 @ws_router.websocket("/ws/sessions/{session_id}")
-async def websocket_agent_session(websocket: WebSocket, session_id: int):
-    await websocket.accept()
+async def websocket_agent_session(
+    websocket: WebSocket,
+    session_id: int,
+    token: Optional[str] = Query(
+        None, description="Access token, if the client cannot send headers"
+    ),
+):
+    user_id = await _authenticate_websocket(websocket, token)
+    if user_id is None:
+        return
+    async with get_read_session_maker()() as db_session:
+        owner = await AgentSessionsCRUD.get_owner(db_session, session_id)
+    if owner is None:
+        await websocket.close(code=1008, reason="Session not found")
+        return
+    # Sessions started from manual context have no project and no owner to check.
+    if owner.user_id is not None and owner.user_id != user_id:
+        await websocket.close(code=1008, reason="You are not owner of this project")
+        return
+
+    connection = await connection_manager.connect(websocket, user_id=user_id)
+    if connection is None:
+        return
+    connection_manager.subscribe(connection, session_id)
     try:
         while True:
             data = await websocket.receive_text()
+            connection.touch()
 
             if data == "ping":
                 try:
-                    async with get_session_maker() as db_session:
-                        db_session_obj = await AgentSessionsCRUD.get_by_id(
-                            db_session, session_id
-                        )
-                        requirement = await AgentSessionRequirementCRUD.get_by_session_id(
-                            db_session, session_id
+                    async with get_read_session_maker()() as db_session:
+                        frame = await load_snapshot_frame(db_session, session_id)
+                    if frame is None:
+                        connection.send(
+                            dumps({"status": "error", "message": "Session not found"})
                         )
-
-                        if not db_session_obj:
-                            await websocket.send_json(
-                                {"status": "error", "message": "Session not found"}
-                            )
-                            continue
-
-                        questions = sorted(
-                            [
-                                m
-                                for m in db_session_obj.messages
-                                if m.message_type == SessionMessageTypeEnum.QUESTION
-                            ],
-                            key=lambda x: (x.created_at, x.id),
-                        )
-                        answers = [
-                            m
-                            for m in db_session_obj.messages
-                            if m.message_type == SessionMessageTypeEnum.ANSWER
-                        ]
-
-                        result_message = next(
-                            (
-                                m
-                                for m in db_session_obj.messages
-                                if m.message_type == SessionMessageTypeEnum.RESULT
-                            ),
-                            None,
-                        )
-
-                        dialogue = []
-                        stop = False
-                        for q in questions:
-                            if stop:
-                                break
-
-                            answer = next(
-                                (a for a in answers if a.parent_message_id == q.id),
-                                None,
-                            )
-
-                            if answer:
-                                answer_dict = {
-                                    "id": answer.id,
-                                    "content": answer.content,
-                                    "created_at": answer.created_at.isoformat(),
-                                }
-                                if answer.is_skipped:
-                                    answer_dict["is_skipped"] = True
-
-                                dialogue.append(
-                                    {
-                                        "question": {
-                                            "id": q.id,
-                                            "content": q.content,
-                                            "question_number": q.question_number,
-                                            "explanation": q.explanation,
-                                            "created_at": q.created_at.isoformat(),
-                                        },
-                                        "answer": answer_dict,
-                                    }
-                                )
-                            else:
-                                dialogue.append(
-                                    {
-                                        "question": {
-                                            "id": q.id,
-                                            "content": q.content,
-                                            "question_number": q.question_number,
-                                            "explanation": q.explanation,
-                                            "created_at": q.created_at.isoformat(),
-                                        },
-                                        "answer": None,
-                                    }
-                                )
-                                stop = True
-
-                        payload = {
-                            "status": "ok",
-                            "session_id": session_id,
-                            "session_status": db_session_obj.status.value,
-                            "current_iteration": db_session_obj.current_iteration,
-                            "dialogue": dialogue,
-                            "result": (
-                                {
-                                    "requirement_id": requirement.id,
-                                    "content": result_message.content,
-                                    "created_at": result_message.created_at.isoformat(),
-                                }
-                                if result_message
-                                else None
-                            ),
-                        }
-
-                        await websocket.send_json(payload)
+                        continue
+                    # A client polling faster than it reads gets the latest snapshot once.
+                    connection.send(frame, key=("snapshot", session_id))
 
                 except Exception as e:
-                    await websocket.send_json(
-                        {"status": "error", "message": f"Server error: {str(e)}"}
+                    connection.send(
+                        dumps({"status": "error", "message": f"Server error: {str(e)}"})
                     )
 
             elif data == "disconnect":
-                await websocket.close()
+                await connection.close()
                 break
             else:
-                await websocket.send_json(
-                    {
-                        "status": "error",
-                        "message": f"Unknown command: {data}. Use 'ping' or 'disconnect'",
-                    }
+                connection.send(
+                    dumps(
+                        {
+                            "status": "error",
+                            "message": f"Unknown command: {data}. Use 'ping' or 'disconnect'",
+                        }
+                    )
                 )
 
     except WebSocketDisconnect:
         pass
     except Exception as e:
         try:
-            await websocket.send_json({"status": "error", "message": str(e)})
+            await websocket.send_text(dumps({"status": "error", "message": str(e)}))
         except:
             pass
+    finally:
+        connection_manager.disconnect(connection)
+
+
+async def _subscribe_session(connection, user_id: int, session_id) -> None:
+    if (
+        not isinstance(session_id, int)
+        or isinstance(session_id, bool)
+        or session_id < 1
+    ):
+        connection.send(
+            dumps({"type": "error", "message": "session_id must be a positive integer"})
+        )
+        return
+    if session_id not in connection.sessions:
+        if len(connection.sessions) >= settings.WS_MAX_SUBSCRIPTIONS_PER_CONNECTION:
+            connection.send(
+                dumps(
+                    {
+                        "type": "error",
+                        "session_id": session_id,
+                        "message": "Too many subscriptions",
+                    }
+                )
+            )
+            return
+        async with get_read_session_maker()() as db_session:
+            owner = await AgentSessionsCRUD.get_owner(db_session, session_id)
+        if owner is None:
+            connection.send(
+                dumps(
+                    {
+                        "type": "error",
+                        "session_id": session_id,
+                        "message": "Session not found",
+                    }
+                )
+            )
+            return
+        # Sessions started from manual context have no project and no owner to check.
+        if owner.user_id is not None and owner.user_id != user_id:
+            connection.send(
+                dumps(
+                    {
+                        "type": "error",
+                        "session_id": session_id,
+                        "message": "You are not owner of this project",
+                    }
+                )
+            )
+            return
+        connection_manager.subscribe(connection, session_id)
+    connection.send(dumps({"type": "subscribed", "session_id": session_id}))
+    connection_manager.refresh(session_id)
+
+
+@ws_router.websocket("/ws")
+async def websocket_user_sessions(
+    websocket: WebSocket,
+    token: Optional[str] = Query(
+        None, description="Access token, if the client cannot send headers"
+    ),
+):
+    # Client messages: {"type": "subscribe" | "unsubscribe", "session_id": N},
+    # {"type": "ping"} and {"type": "pong"} in reply to server pings.
+    user_id = await _authenticate_websocket(websocket, token)
+    if user_id is None:
+        return
+
+    connection = await connection_manager.connect(
+        websocket, user_id=user_id, heartbeat=True, push=True
+    )
+    if connection is None:
+        return
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            connection.touch()
+            try:
+                message = orjson.loads(raw)
+                kind = message.get("type")
+            except (orjson.JSONDecodeError, AttributeError):
+                connection.send(dumps({"type": "error", "message": "Invalid message"}))
+                continue
+
+            match kind:
+                case "pong":
+                    pass
+                case "ping":
+                    connection.send(dumps({"type": "pong"}), key="pong")
+                case "subscribe":
+                    try:
+                        await _subscribe_session(
+                            connection, user_id, message.get("session_id")
+                        )
+                    except Exception as e:
+                        connection.send(
+                            dumps(
+                                {"type": "error", "message": f"Server error: {str(e)}"}
+                            )
+                        )
+                case "unsubscribe":
+                    session_id = message.get("session_id")
+                    if (
+                        isinstance(session_id, int)
+                        and session_id in connection.sessions
+                    ):
+                        connection_manager.unsubscribe(connection, session_id)
+                    connection.send(
+                        dumps({"type": "unsubscribed", "session_id": session_id})
+                    )
+                case _:
+                    connection.send(
+                        dumps(
+                            {
+                                "type": "error",
+                                "message": f"Unknown message type: {kind}",
+                            }
+                        )
+                    )
+
+    except WebSocketDisconnect:
+        pass
+    finally:
+        connection_manager.disconnect(connection)
+
+
+@router.get(
+    "/sessions/{session_id}/events",
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        401: {"description": "Unauthorized", "model": schemas.ErrorResponse},
+        403: {
+            "description": "You are not owner of this project",
+            "model": schemas.ErrorResponse,
+        },
+        404: {"description": "Not found", "model": schemas.ErrorResponse},
+    },
+)
+async def stream_session_events(
+    session_id: PositiveInt = Path(..., description="The identifier of session"),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    current_user: UserORM = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    owner = await AgentSessionsCRUD.get_owner(session, session_id)
+    if owner is None:
+        raise NotFoundException("agent_sessions", "id", session_id)
+    # Sessions started from manual context have no project and no owner to check.
+    if owner.user_id is not None and owner.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not owner of this project",
+        )
+    # The stream can stay open for hours: return the connection to the pool now.
+    await session.close()
+
+    return StreamingResponse(
+        session_event_stream(session_id, last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/sessions/{session_id}/snapshot",
+    status_code=200,
+    responses={
+        200: {"content": {"application/json": {}}},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        401: {"description": "Unauthorized", "model": schemas.ErrorResponse},
+        403: {
+            "description": "You are not owner of this project",
+            "model": schemas.ErrorResponse,
+        },
+        404: {"description": "Not found", "model": schemas.ErrorResponse},
+    },
+)
+async def get_session_snapshot(
+    session_id: PositiveInt = Path(..., description="The identifier of session"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserORM = Depends(get_current_read_user),
+    session: AsyncSession = Depends(get_read_db),
+):
+    snapshot = await load_snapshot(session, session_id)
+    if snapshot is None:
+        raise NotFoundException("agent_sessions", "id", session_id)
+    if snapshot.owner_id is not None and snapshot.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not owner of this project",
+        )
+
+    etag = make_etag("session", session_id, snapshot.version, None)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return Response(
+        content=snapshot.frame, media_type="application/json", headers={"ETag": etag}
+    )
 
 
 @router.post(
@@ -246,7 +436,9 @@ async def start_agent_session_on_project(
     try:
         await agent.health_check()
 
-        await agent.create_session_on_project(project.external_id, payload.user_goal)
+        created = await agent.create_session_on_project(
+            project.external_id, payload.user_goal
+        )
     except HTTPException as e:
         raise HTTPException(
             status_code=e.status_code,
@@ -256,6 +448,8 @@ async def start_agent_session_on_project(
         "project_id": project.id,
         "user_goal": payload.user_goal,
         "status": SessionStatusEnum.PROCESSING,
+        # Known before the first webhook, so a lost one can be reconciled.
+        "external_session_id": created.get("session_id"),
     }
 
     agent_session = await AgentSessionsCRUD.create(session, session_data)
@@ -285,59 +479,19 @@ async def start_agent_session_on_context(
         "status": SessionStatusEnum.PROCESSING,
     }
 
-    agent_session = await AgentSessionsCRUD.create(session, agent_session_data)
-    message_1_data = {
-        "session_id": agent_session.id,
-        "role": SessionMessageRoleEnum.AGENT,
-        "content": "Что хотите сделать?",
-        "message_type": SessionMessageTypeEnum.QUESTION,
-    }
-    message_1 = await AgentSessionMessageCRUD.create(session, message_1_data)
-    answer_1_data = {
-        "session_id": agent_session.id,
-        "role": SessionMessageRoleEnum.USER,
-        "content": payload.context_questions.task,
-        "message_type": SessionMessageTypeEnum.ANSWER,
-        "parent_message_id": message_1.id
-    }
-    await AgentSessionMessageCRUD.create(session, answer_1_data)
-
-    message_2_data = {
-        "session_id": agent_session.id,
-        "role": SessionMessageRoleEnum.AGENT,
-        "content": "Какая цель у этой задачи?",
-        "message_type": SessionMessageTypeEnum.QUESTION,
-    }
-    message_2 = await AgentSessionMessageCRUD.create(session, message_2_data)
-    answer_2_data = {
-        "session_id": agent_session.id,
-        "role": SessionMessageRoleEnum.USER,
-        "content": payload.context_questions.goal,
-        "message_type": SessionMessageTypeEnum.ANSWER,
-        "parent_message_id": message_2.id
-    }
-    await AgentSessionMessageCRUD.create(session, answer_2_data)
-
-    message_3_data = {
-        "session_id": agent_session.id,
-        "role": SessionMessageRoleEnum.AGENT,
-        "content": "Какую ценность несёт данное нововведение?",
-        "message_type": SessionMessageTypeEnum.QUESTION,
-    }
-    message_3 = await AgentSessionMessageCRUD.create(session, message_3_data)
-    answer_3_data = {
-        "session_id": agent_session.id,
-        "role": SessionMessageRoleEnum.USER,
-        "content": payload.context_questions.value,
-        "message_type": SessionMessageTypeEnum.ANSWER,
-        "parent_message_id": message_3.id
-    }
-    await AgentSessionMessageCRUD.create(session, answer_3_data)
+    context = payload.context_questions.model_dump()
+    dialogue = [
+        (template.format(user_goal=payload.user_goal), context[field])
+        for field, template in settings.CONTEXT_QUESTION_TEMPLATES.items()
+    ]
+    agent_session = await AgentSessionsCRUD.create_with_dialogue(
+        session, agent_session_data, dialogue
+    )
 
     try:
         await agent.health_check()
 
-        await agent.create_interview_session_on_context(
+        created = await agent.create_interview_session_on_context(
             payload.context_questions, payload.user_goal
         )
     except HTTPException as e:
@@ -345,7 +499,10 @@ async def start_agent_session_on_context(
             status_code=e.status_code,
             detail=f"Failed to create session on agent: {e.detail}",
         )
-
+    if created.get("session_id"):
+        agent_session = await AgentSessionsCRUD.update(
+            session, agent_session, {"external_session_id": created["session_id"]}
+        )
 
     return agent_session
 
@@ -360,7 +517,10 @@ async def start_agent_session_on_context(
             "model": schemas.ErrorResponse,
         },
         401: {"description": "Unauthorized", "model": schemas.ErrorResponse},
-        403: {"description": "You are not owner of this project", "model": schemas.ErrorResponse},
+        403: {
+            "description": "You are not owner of this project",
+            "model": schemas.ErrorResponse,
+        },
         404: {"description": "Not found", "model": schemas.ErrorResponse},
         500: {"description": "Internal Server Error", "model": schemas.ErrorResponse},
     },
@@ -373,37 +533,50 @@ async def submit_text_answers(
     agent: AgentService = Depends(get_agent),
     session: AsyncSession = Depends(get_db),
 ):
-    question = await AgentSessionMessageCRUD.get_by_id(session, question_id)
-    exist_answer = await AgentSessionMessageCRUD.answer_exists(
-        session=session,
-        question_id=question.id,
+    rows = await AgentSessionMessageCRUD.get_questions_for_answers(
+        session, session_id, [question_id]
     )
-
-    if exist_answer:
+    if not rows:
+        raise NotFoundException("agent_sessions", "id", session_id)
+    # Sessions started from manual context have no project and no owner to check.
+    if rows[0].user_id is not None and rows[0].user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not owner of this project",
+        )
+    question = rows[0]
+    if question.question_id is None:
+        raise NotFoundException("agent_session_messages", "id", question_id)
+    if question.answered:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Answer for this question already exists",
         )
-    agent_session = await AgentSessionsCRUD.get_by_id(session, session_id)
-
-    if agent_session.status != SessionStatusEnum.WAITING_FOR_ANSWERS:
+    if question.session_status != SessionStatusEnum.WAITING_FOR_ANSWERS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Session is not waiting for answers",
         )
 
     message_data = {
-        "session_id": agent_session.id,
-        "parent_message_id": question.id,
+        "session_id": session_id,
+        "parent_message_id": question_id,
         "role": SessionMessageRoleEnum.USER,
         "content": payload.answer,
         "is_skipped": payload.is_skipped,
         "message_type": SessionMessageTypeEnum.ANSWER,
     }
 
-    message = await AgentSessionMessageCRUD.create(session, message_data)
+    created = await AgentSessionMessageCRUD.create_answers(session, [message_data])
+    if created is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Answer for this question already exists",
+        )
+    message = created[0]
+    await session_events.publish(session, session_id)
     question_external_id = question.question_external_id
-    session_external_id = agent_session.external_session_id
+    session_external_id = question.external_session_id
 
     try:
         await agent.health_check()
@@ -421,6 +594,117 @@ async def submit_text_answers(
     return message
 
 
+@router.post(
+    "/sessions/{session_id}/answers",
+    status_code=200,
+    response_model=List[schemas.UserSessionAnswerShallow],
+    responses={
+        400: {
+            "description": "Answers for these questions already exist | Session is not waiting for answers",
+            "model": schemas.ErrorResponse,
+        },
+        401: {"description": "Unauthorized", "model": schemas.ErrorResponse},
+        403: {
+            "description": "You are not owner of this project",
+            "model": schemas.ErrorResponse,
+        },
+        404: {"description": "Not found", "model": schemas.ErrorResponse},
+        500: {"description": "Internal Server Error", "model": schemas.ErrorResponse},
+    },
+)
+async def submit_text_answers_batch(
+    payload: schemas.SessionAnswersBatchRequest,
+    session_id: PositiveInt = Path(..., description="The identifier of session"),
+    current_user: UserORM = Depends(get_current_user),
+    agent: AgentService = Depends(get_agent),
+    session: AsyncSession = Depends(get_db),
+):
+    question_ids = [answer.question_id for answer in payload.answers]
+    rows = await AgentSessionMessageCRUD.get_questions_for_answers(
+        session, session_id, question_ids
+    )
+    if not rows:
+        raise NotFoundException("agent_sessions", "id", session_id)
+    # Sessions started from manual context have no project and no owner to check.
+    if rows[0].user_id is not None and rows[0].user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not owner of this project",
+        )
+    if rows[0].session_status != SessionStatusEnum.WAITING_FOR_ANSWERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Session is not waiting for answers",
+        )
+
+    questions = {row.question_id: row for row in rows if row.question_id is not None}
+    missing = [qid for qid in question_ids if qid not in questions]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Questions {missing} not found in session {session_id}",
+        )
+    answered = [qid for qid in question_ids if questions[qid].answered]
+    if answered:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Answers for questions {answered} already exist",
+        )
+
+    messages = await AgentSessionMessageCRUD.create_answers(
+        session,
+        [
+            {
+                "session_id": session_id,
+                "parent_message_id": answer.question_id,
+                "role": SessionMessageRoleEnum.USER,
+                "content": answer.answer,
+                "is_skipped": answer.is_skipped,
+                "message_type": SessionMessageTypeEnum.ANSWER,
+            }
+            for answer in payload.answers
+        ],
+    )
+    if messages is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Answers for some of these questions already exist",
+        )
+    await session_events.publish(session, session_id)
+
+    session_external_id = rows[0].external_session_id
+    try:
+        await agent.health_check()
+    except HTTPException as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Failed to submit answers in agent: {e.detail}",
+        )
+    # The agent has no batch endpoint: forward concurrently and let every
+    # submission finish, since the answers are already stored.
+    results = await asyncio.gather(
+        *(
+            agent.submit_text_answer(
+                session_external_id,
+                questions[answer.question_id].question_external_id,
+                answer.answer,
+                answer.is_skipped,
+            )
+            for answer in payload.answers
+        ),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, HTTPException):
+            raise HTTPException(
+                status_code=result.status_code,
+                detail=f"Failed to submit answers in agent: {result.detail}",
+            )
+        if isinstance(result, BaseException):
+            raise result
+    return messages
+
+
 @router.post(
     "/sessions/{session_id}/cancel",
     status_code=200,
@@ -460,5 +744,6 @@ async def cancel_session(
     agent_session = await AgentSessionsCRUD.update(
         session, agent_session, agent_session_data
     )
+    await session_events.publish(session, session_id)
 
-    return agent_session
\ No newline at end of file
+    return agent_session
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from jose import JWTError
 
 from app.core import (
     get_db,
     create_access_token,
     get_password_hash,
     create_refresh_token,
+    decode_refresh_token,
     verify_password,
 )
 from app.models.user import User as UserORM
@@ -17,10 +19,10 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 async def _create_tokens(session: AsyncSession, user: UserORM):
-    refresh, expires_at = create_refresh_token(user.id)
+    refresh, expires_at, jti = create_refresh_token(user.id)
 
     refresh_token_data = {
-        "token": refresh,
+        "jti": jti,
         "user_id": user.id,
         "expires_at": expires_at,
     }
@@ -106,7 +108,10 @@ async def logout(
     response_model=schemas.Token,
     status_code=200,
     responses={
-        400: {"description": "Bad Request", "model": schemas.ErrorResponse},
+        401: {
+            "description": "Invalid, expired or already used refresh token",
+            "model": schemas.ErrorResponse,
+        },
         422: {
             "description": "Validation Error",
             "model": schemas.RequestValidationError,
@@ -118,12 +123,23 @@ async def refresh_token(
     payload: schemas.RefreshToken,
     session: AsyncSession = Depends(get_db),
 ):
-    token = await RefreshTokenCRUD.get_by_token(session, payload.refresh_token)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid refresh token"
-        )
-
-    user = await UserCRUD.get_by_id(session, token.user_id)
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        token_payload = decode_refresh_token(payload.refresh_token)
+        user_id = int(token_payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
+        raise invalid_token
+
+    # The old token is deleted in the transaction that stores the new one:
+    # a token used twice, even concurrently, is rejected the second time.
+    if await RefreshTokenCRUD.consume(session, token_payload["jti"], user_id) is None:
+        await session.rollback()
+        raise invalid_token
+
+    user = await UserCRUD.get_by_id(session, user_id)
 
     return await _create_tokens(session, user)
@@ -1,4 +1,14 @@
-from fastapi import status, APIRouter, Depends, Query, Path, HTTPException, Form
+from fastapi import (
+    status,
+    APIRouter,
+    Depends,
+    Query,
+    Path,
+    HTTPException,
+    Form,
+    Header,
+    Response,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from pydantic import PositiveInt
@@ -8,12 +18,13 @@ from app import schemas
 from app.dependencies import (
     get_text_files,
     get_agent,
+    get_read_db,
 )
 from app.models import User as UserORM, ProjectStatusEnum
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_read_user
 from app.cruds import ProjectCRUD, ProjectFileCRUD
-from app.services import AgentService
-from app.utils import save_file_with_meta
+from app.services import AgentService, response_cache, make_etag, etag_matches
+from app.utils import save_file_with_meta, encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -23,6 +34,7 @@ router = APIRouter(prefix="/projects", tags=["projects"])
     status_code=200,
     response_model=schemas.ProjectsGet,
     responses={
+        400: {"description": "Invalid cursor", "model": schemas.ErrorResponse},
         401: {"description": "Unauthorized", "model": schemas.ErrorResponse},
     },
 )
@@ -30,13 +42,26 @@ async def get_projects_list(
     search: Optional[str] = Query(None, description="Search string"),
     offset: int = Query(0, ge=0, description="Offset"),
     limit: int = Query(10, gt=0, le=50, description="Limit"),
-    current_user: UserORM = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the previous page, replaces offset"
+    ),
+    current_user: UserORM = Depends(get_current_read_user),
+    session: AsyncSession = Depends(get_read_db),
 ):
-    projects, total = await ProjectCRUD.get_list_by_user(
-        session, current_user, search, offset, limit
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, search)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    projects, total, next_key = await ProjectCRUD.get_list_by_user(
+        session, current_user, search, offset, limit, after
     )
-    return schemas.ProjectsGet(items=projects, total=total)
+    next_cursor = encode_cursor(*next_key, search) if next_key else None
+    return schemas.ProjectsGet(items=projects, total=total, next_cursor=next_cursor)
 
 
 @router.post(
@@ -101,6 +126,7 @@ async def create_project(
     status_code=200,
     response_model=schemas.ProjectBase,
     responses={
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         400: {
             "description": "You are not owner of this project",
             "model": schemas.ErrorResponse,
@@ -111,16 +137,35 @@ async def create_project(
 )
 async def get_project_by_id(
     project_id: PositiveInt = Path(..., description="The identifier of project"),
-    current_user: UserORM = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserORM = Depends(get_current_read_user),
+    session: AsyncSession = Depends(get_read_db),
 ):
-    project = await ProjectCRUD.get_full_by_id(session, project_id)
-    if project.user_id != current_user.id:
+    marker = await ProjectCRUD.get_version(session, project_id)
+    if marker.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not owner of this project",
         )
-    return project
+    etag = make_etag("project", project_id, marker.version, marker.updated_at)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    body = response_cache.get(("project", project_id), etag)
+    if body is None:
+        project = await ProjectCRUD.get_full_by_id(session, project_id)
+        # The graph may have moved on since the version read; tag what we send.
+        etag = make_etag("project", project.id, project.version, project.updated_at)
+        body = response_cache.put(
+            ("project", project_id),
+            etag,
+            schemas.ProjectBase.model_validate(project, from_attributes=True)
+            .model_dump_json()
+            .encode(),
+        )
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @router.patch(
@@ -181,6 +226,7 @@ async def add_files_to_project_by_id(
             status_code=e.status_code,
             detail=f"Failed to create project in agent: {e.detail}",
         )
+    response_cache.invalidate(("project", project_id))
     return project
 
 
@@ -221,3 +267,4 @@ async def delete_project_by_id(
             detail=f"Failed to delete project on agent: {e.detail}",
         )
     await ProjectCRUD.remove(session, project)
+    response_cache.invalidate(("project", project_id))
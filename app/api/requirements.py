@@ -1,13 +1,29 @@
-from fastapi import APIRouter, Depends, Path, HTTPException, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    Path,
+    HTTPException,
+    Query,
+    Header,
+    Response,
+    status,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import StreamingResponse
+from typing import Optional
 
 from app.core.database import get_db
 from app import schemas
 from app.models.user import User as UserORM
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_read_user, get_read_db
 from app.cruds import AgentSessionRequirementCRUD
-from app.services import markdown_to_pdf, markdown_to_word
+from app.services import (
+    markdown_to_pdf,
+    markdown_to_word,
+    response_cache,
+    make_etag,
+    etag_matches,
+)
 
 router = APIRouter(prefix="/requirements", tags=["requirements"])
 
@@ -17,6 +33,7 @@ router = APIRouter(prefix="/requirements", tags=["requirements"])
     status_code=200,
     response_model=schemas.RequirementBase,
     responses={
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         401: {"description": "Unauthorized"},
         403: {"description": "Forbidden"},
         404: {"description": "Not found"},
@@ -25,12 +42,39 @@ router = APIRouter(prefix="/requirements", tags=["requirements"])
 )
 async def get_requirements(
     requirements_id: int = Path(..., description="The identifier of requirements"),
-    current_user: UserORM = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserORM = Depends(get_current_read_user),
+    session: AsyncSession = Depends(get_read_db),
 ):
-    requirements = await AgentSessionRequirementCRUD.get_by_id(session, requirements_id)
+    version, updated_at = await AgentSessionRequirementCRUD.get_version(
+        session, requirements_id
+    )
+    etag = make_etag("requirement", requirements_id, version, updated_at)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    body = response_cache.get(("requirement", requirements_id), etag)
+    if body is None:
+        requirements = await AgentSessionRequirementCRUD.get_by_id(
+            session, requirements_id
+        )
+        etag = make_etag(
+            "requirement",
+            requirements.id,
+            requirements.version,
+            requirements.updated_at or requirements.created_at,
+        )
+        body = response_cache.put(
+            ("requirement", requirements_id),
+            etag,
+            schemas.RequirementBase.model_validate(requirements, from_attributes=True)
+            .model_dump_json()
+            .encode(),
+        )
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
-    return requirements
 
 @router.patch(
     "/{requirements_id}",
@@ -49,20 +93,24 @@ async def update_requirements(
     current_user: UserORM = Depends(get_current_user),
     session: AsyncSession = Depends(get_db),
 ):
-    existing_requirements = await AgentSessionRequirementCRUD.get_by_id(session, requirements_id)
+    existing_requirements = await AgentSessionRequirementCRUD.get_by_id(
+        session, requirements_id
+    )
     update_data = payload.model_dump(exclude_unset=True)
 
-    requirements = await AgentSessionRequirementCRUD.update(session, existing_requirements, update_data)
+    requirements = await AgentSessionRequirementCRUD.update(
+        session, existing_requirements, update_data
+    )
+    response_cache.invalidate(("requirement", requirements_id))
     return requirements
 
-@router.get(
-    "/{requirements_id}/export"
-)
+
+@router.get("/{requirements_id}/export")
 async def export_requirements(
     requirements_id: int = Path(..., description="The identifier of session"),
     file: str = Query("docx", description="Export format: 'docx' or 'pdf'"),
-    current_user: UserORM = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db),
+    current_user: UserORM = Depends(get_current_read_user),
+    session: AsyncSession = Depends(get_read_db),
 ):
 
     requirements = await AgentSessionRequirementCRUD.get_by_id(session, requirements_id)
@@ -73,11 +121,13 @@ async def export_requirements(
         filename = f"requirements_{requirements_id}.pdf"
     else:
         file_stream = markdown_to_word(requirements.content)
-        media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        media_type = (
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        )
         filename = f"requirements_{requirements_id}.docx"
 
     return StreamingResponse(
         file_stream,
         media_type=media_type,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
\ No newline at end of file
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -4,14 +4,18 @@ from .security import (
     verify_password,
     get_password_hash,
     create_refresh_token,
+    decode_refresh_token,
     is_expired,
+    token_verifier,
 )
 
 __all__ = (
     "get_db",
     "create_access_token",
     "create_refresh_token",
+    "decode_refresh_token",
     "verify_password",
     "get_password_hash",
     "is_expired",
+    "token_verifier",
 )
@@ -1,4 +1,5 @@
 import os
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -15,10 +16,104 @@ class Settings(BaseSettings):
     BACKEND_CORS_ORIGINS: str = os.getenv("", "BACKEND_CORS_ORIGINS")
     EXTERNAL_API_URL: str = os.getenv("", "EXTERNAL_API_URL")
     CALLBACK_URL: str = os.getenv("", "СALLBACK_URL")
+    TOKEN_VERIFY_CACHE_SIZE: int = 2048
+    STARTUP_MIGRATIONS: str = "check"  # upgrade | check | skip
+
+    RELOAD: bool = False
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8080
+    SERVER_WORKERS: Optional[int] = None  # defaults to the number of usable CPUs
+    SERVER_LOOP: str = "uvloop"
+    SERVER_HTTP: str = "httptools"
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE_SECONDS: int = 15
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    SERVER_ACCESS_LOG: bool = False
+
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    DB_APPLICATION_NAME: str = "rtf-team-api"
+
+    DATABASE_REPLICA_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    DEBUG: bool = False
+    DB_QUERY_PROFILING: bool = False
+    DB_SLOW_QUERY_MS: float = 200.0
+
+    # Shared by the workers of one server so /metrics covers all of them;
+    # api_start.py creates a temporary one when running several workers.
+    METRICS_MULTIPROCESS_DIR: Optional[str] = None
+    METRICS_DUMP_INTERVAL_SECONDS: float = 5.0
+
+    TRACING_EXPORTER: str = "none"  # none | console | file
+    TRACING_FILE_PATH: str = "traces.jsonl"
+
+    AGENT_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    AGENT_READ_TIMEOUT_SECONDS: float = 10.0
+    AGENT_HEALTH_TIMEOUT_SECONDS: float = 2.0
+    AGENT_UPLOAD_TIMEOUT_SECONDS: float = 60.0
+    AGENT_RETRIES: int = 2  # idempotent calls only
+    AGENT_HEDGE_AFTER_SECONDS: Optional[float] = None  # hedge reads, off by default
+    AGENT_DEADLINE_SECONDS: float = 30.0  # total budget for one incoming request
+
+    # Questions seeded before the user's answers when a session starts from
+    # manual context, keyed by ContextQuestion field; {user_goal} is substituted.
+    CONTEXT_QUESTION_TEMPLATES: Dict[str, str] = {
+        "task": "Что хотите сделать?",
+        "goal": "Какая цель у этой задачи?",
+        "value": "Какую ценность несёт данное нововведение?",
+    }
+
+    RESPONSE_CACHE_SIZE: int = 0  # cached GET responses per worker, 0 disables
+
+    # memory keeps the limits per worker; postgres shares them between workers
+    RATE_LIMIT_BACKEND: str = "postgres"  # postgres | memory
+    RATE_LIMIT_SLOT_TTL_SECONDS: float = 300.0  # longer than any limited request
+    RATE_LIMIT_AGENT_PER_MINUTE: int = 60
+    RATE_LIMIT_AGENT_BURST: int = 20
+    MAX_IN_FLIGHT_AGENT_CALLS_PER_USER: int = 4
+    RATE_LIMIT_UPLOAD_PER_MINUTE: int = 10
+    RATE_LIMIT_UPLOAD_BURST: int = 5
+    MAX_IN_FLIGHT_UPLOADS_PER_USER: int = 2
+
+    WS_MAX_CONNECTIONS_PER_WORKER: int = 10000
+    WS_MAX_CONNECTIONS_PER_USER: int = 20
+    WS_MAX_SUBSCRIPTIONS_PER_CONNECTION: int = 100
+    # Frames a client may fall behind by before it is dropped.
+    WS_SEND_QUEUE_SIZE: int = 32
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+    # Without heartbeats, a client silent this long is dropped.
+    WS_IDLE_TIMEOUT_SECONDS: float = 300.0
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 20.0
+    WS_HEARTBEAT_TIMEOUT_SECONDS: float = 20.0
+
+    SESSION_EVENTS_BACKEND: str = "postgres"  # postgres (LISTEN/NOTIFY) | memory
+    SESSION_EVENTS_RECONNECT_SECONDS: float = 2.0
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    SSE_RETRY_MS: int = 3000
+    SSE_MAX_CONCURRENT_READS: int = 5  # per worker, keep well under DB_POOL_SIZE
+
+    # Sessions left in PROCESSING longer than this are checked with the agent
+    SESSION_RECONCILE_STUCK_SECONDS: int = 900
+    SESSION_RECONCILE_INTERVAL_SECONDS: int = 300  # 0 disables the reconciler
+    SESSION_RECONCILE_BATCH_SIZE: int = 100
+    SESSION_RECONCILE_CONCURRENCY: int = 5  # agent calls in flight
+
+    REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: int = 3600
+    REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = 1000
 
 
 class LocalSettings(Settings):
     RELOAD: bool = True
+    DEBUG: bool = True
+    STARTUP_MIGRATIONS: str = "upgrade"
+    RATE_LIMIT_BACKEND: str = "memory"
 
 
 settings_name = {"local": LocalSettings(), "production": Settings()}
@@ -1,9 +1,159 @@
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+from sqlalchemy import event, func, select
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.query_profiler import install_query_profiler
 
-engine = create_async_engine(settings.DATABASE_URL)
-session = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class PoolWaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.checkouts += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_stats.record(time.perf_counter() - started)
+
+
+def _create_engine(url: str, poolclass=AsyncAdaptedQueuePool):
+    return create_async_engine(
+        url,
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "application_name": settings.DB_APPLICATION_NAME,
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+            },
+        },
+    )
+
+
+class PrimarySession(Session):
+    pass
+
+
+engine = _create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool)
+session = async_sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    sync_session_class=PrimarySession,
+)
+
+if settings.DATABASE_REPLICA_URL:
+    read_engine = _create_engine(settings.DATABASE_REPLICA_URL)
+    read_session = async_sessionmaker(
+        autocommit=False, autoflush=False, bind=read_engine
+    )
+else:
+    read_engine = engine
+    read_session = session
+
+if settings.DB_QUERY_PROFILING:
+    install_query_profiler(engine)
+    if read_engine is not engine:
+        install_query_profiler(read_engine)
+
+
+class WriteMarker:
+    """Time of the client's last write on the primary, carried in a cookie.
+
+    ``last_write`` comes from the request and is moved forward by its own
+    commits; ``written`` tells the middleware to send the new value back.
+    """
+
+    def __init__(self, last_write: Optional[float] = None):
+        self.last_write = last_write
+        self.written = False
+
+
+write_marker: ContextVar[Optional[WriteMarker]] = ContextVar(
+    "write_marker", default=None
+)
+
+
+def get_read_session_maker() -> async_sessionmaker:
+    """The replica, or the primary while the client's last write may lag on it."""
+    if read_session is session:
+        return session
+    marker = write_marker.get()
+    if (
+        marker is not None
+        and marker.last_write is not None
+        and time.time() - marker.last_write < settings.READ_YOUR_WRITES_SECONDS
+    ):
+        return session
+    return read_session
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _flag_writes(db_session, flush_context):
+    db_session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _track_writes(db_session):
+    if db_session.info.pop("has_writes", False):
+        marker = write_marker.get()
+        if marker is not None:
+            marker.last_write = time.time()
+            marker.written = True
+
+
+def get_pool_stats() -> dict:
+    pool = engine.pool
+    checkouts = pool_wait_stats.checkouts
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        "wait_seconds_total": pool_wait_stats.total_wait,
+        "wait_seconds_avg": (
+            pool_wait_stats.total_wait / checkouts if checkouts else 0.0
+        ),
+        "wait_seconds_max": pool_wait_stats.max_wait,
+    }
+
+
+@asynccontextmanager
+async def advisory_lock(key: int) -> AsyncIterator[bool]:
+    """Try to take a cluster-wide lock; yields whether this worker holds it.
+
+    The lock is transaction-scoped, so it is released however the block
+    exits, even if the connection is lost.
+    """
+    async with session() as lock_session:
+        yield await lock_session.scalar(select(func.pg_try_advisory_xact_lock(key)))
 
 
 async def get_db():
@@ -0,0 +1,426 @@
+import asyncio
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+Series = Dict[Tuple[str, ...], Any]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(
+    names: Tuple[str, ...], values: Tuple[str, ...], extra: str = ""
+) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric(ABC):
+    type_name = ""
+    # Whether the values of a worker that has exited still count, as for
+    # counters; gauges describe live processes only.
+    keep_exited = True
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def series(self) -> Series:
+        """Current values of this process by label values."""
+
+    @abstractmethod
+    def merge(self, values: List[Any]) -> Any:
+        """Combine the values of one series from several workers."""
+
+    @abstractmethod
+    def samples(self, series: Series) -> List[str]: ...
+
+    def render(self, series: Optional[Series] = None) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self.samples(self.series() if series is None else series))
+        return "\n".join(lines)
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+    keep_exited = False
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        aggregate: Callable[[Iterable[float]], float] = sum,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0
+        self._function: Optional[Callable[[], float]] = None
+        self.aggregate = aggregate
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def series(self) -> Series:
+        if self._function is not None:
+            return {(): self._function()}
+        return dict(self._values)
+
+    def merge(self, values: List[float]) -> float:
+        return self.aggregate(values)
+
+    def samples(self, series: Series) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in series.items()
+        ]
+
+
+class Counter(Gauge):
+    type_name = "counter"
+    keep_exited = True
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        raise ValueError("Counters can only increase")
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def series(self) -> Series:
+        return {key: list(values) for key, values in self._series.items()}
+
+    def merge(self, values: List[List[float]]) -> List[float]:
+        return [sum(column) for column in zip(*values)]
+
+    def samples(self, series: Series) -> List[str]:
+        lines = []
+        for key, values in series.items():
+            for bound, count in zip(self.buckets, values):
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{labels} {values[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    """Metrics of this process, or of all workers sharing ``multiprocess_dir``.
+
+    In multiprocess mode every worker writes its series to ``<pid>.json`` in
+    the directory and a scrape, served by any worker, adds them up. Counters
+    and histograms of exited workers are kept so totals never go back.
+    """
+
+    def __init__(self, multiprocess_dir: Optional[str] = None):
+        self.multiprocess_dir = multiprocess_dir
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def dump(self) -> None:
+        if not self.multiprocess_dir:
+            return
+        data = {
+            name: [[list(key), value] for key, value in metric.series().items()]
+            for name, metric in self._metrics.items()
+        }
+        path = os.path.join(self.multiprocess_dir, f"{os.getpid()}.json")
+        with open(f"{path}.tmp", "wb") as file:
+            file.write(orjson.dumps(data))
+        os.replace(f"{path}.tmp", path)
+
+    def _collect(self) -> Dict[str, Series]:
+        self.dump()
+        collected: Dict[str, Dict[Tuple[str, ...], List[Any]]] = {
+            name: {} for name in self._metrics
+        }
+        for file_name in os.listdir(self.multiprocess_dir):
+            pid, extension = os.path.splitext(file_name)
+            if extension != ".json" or not pid.isdigit():
+                continue
+            running = _is_running(int(pid))
+            try:
+                with open(os.path.join(self.multiprocess_dir, file_name), "rb") as file:
+                    data = orjson.loads(file.read())
+            except (OSError, orjson.JSONDecodeError):
+                continue
+            for name, series in data.items():
+                metric = self._metrics.get(name)
+                if metric is None or not (running or metric.keep_exited):
+                    continue
+                for key, value in series:
+                    collected[name].setdefault(tuple(key), []).append(value)
+        return {
+            name: {
+                key: self._metrics[name].merge(values) for key, values in series.items()
+            }
+            for name, series in collected.items()
+        }
+
+    def render(self) -> str:
+        if not self.multiprocess_dir:
+            rendered = (metric.render() for metric in self._metrics.values())
+        else:
+            collected = self._collect()
+            rendered = (
+                metric.render(collected[name]) for name, metric in self._metrics.items()
+            )
+        return "\n".join(rendered) + "\n"
+
+    async def run_dumper(self, interval: float) -> None:
+        """Keep this worker's file fresh for scrapes served by the others."""
+        if not self.multiprocess_dir:
+            return
+        try:
+            while True:
+                self.dump()
+                await asyncio.sleep(interval)
+        finally:
+            # Final counts of an exiting worker.
+            self.dump()
+
+
+def clear_multiprocess_dir(path: str) -> None:
+    """Drop files of a previous run; called by the server before workers start."""
+    os.makedirs(path, exist_ok=True)
+    for file_name in os.listdir(path):
+        if file_name.endswith((".json", ".json.tmp")):
+            os.remove(os.path.join(path, file_name))
+
+
+registry = Registry(settings.METRICS_MULTIPROCESS_DIR)
+
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template.",
+        ("method", "route", "status"),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+)
+websocket_connections = registry.register(
+    Gauge("websocket_connections", "Open WebSocket connections.")
+)
+websocket_subscriptions = registry.register(
+    Gauge(
+        "websocket_subscriptions", "Agent sessions watched over WebSockets, per socket."
+    )
+)
+websocket_queued_frames = registry.register(
+    Gauge("websocket_queued_frames", "Frames waiting in WebSocket send queues.")
+)
+websocket_rejections = registry.register(
+    Counter(
+        "websocket_rejections_total",
+        "WebSocket connections refused by limit.",
+        ("reason",),
+    )
+)
+websocket_evictions = registry.register(
+    Counter(
+        "websocket_evictions_total",
+        "WebSocket connections closed by the server by reason.",
+        ("reason",),
+    )
+)
+websocket_dropped_frames = registry.register(
+    Counter(
+        "websocket_dropped_frames_total",
+        "Outbound WebSocket frames dropped: superseded in the queue or overflowing it.",
+        ("reason",),
+    )
+)
+sse_streams = registry.register(Gauge("sse_streams", "Open server-sent event streams."))
+session_reconciliations = registry.register(
+    Counter(
+        "session_reconciliations_total",
+        "Stuck agent sessions checked with the agent by outcome.",
+        ("outcome",),
+    )
+)
+webhook_processing_duration = registry.register(
+    Histogram(
+        "webhook_processing_seconds",
+        "Agent webhook processing time by callback event.",
+        ("event",),
+    )
+)
+rate_limited_requests = registry.register(
+    Counter(
+        "rate_limited_requests_total",
+        "Requests rejected with 429 by route group and reason.",
+        ("group", "reason"),
+    )
+)
+agent_call_retries = registry.register(
+    Counter(
+        "agent_call_retries_total",
+        "Retried calls to the agent service by method and reason.",
+        ("method", "reason"),
+    )
+)
+agent_call_duration = registry.register(
+    Histogram(
+        "agent_call_duration_seconds",
+        "Latency of calls to the agent service by AgentService method.",
+        ("method", "outcome"),
+    )
+)
+
+
+def track_agent_call(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await func(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            agent_call_duration.observe(
+                time.perf_counter() - started, method=func.__name__, outcome=outcome
+            )
+
+    return wrapper
+
+
+def register_pool_metrics(get_pool_stats: Callable[[], dict]) -> None:
+    for key, documentation in (
+        ("size", "Configured database pool size."),
+        ("checked_out", "Database connections currently checked out."),
+        ("overflow", "Database connections open beyond the pool size."),
+        ("wait_seconds_max", "Longest wait for a database connection."),
+    ):
+        # The longest wait of any worker, the other stats add up.
+        aggregate = max if key == "wait_seconds_max" else sum
+        gauge = registry.register(
+            Gauge(f"db_pool_{key}", documentation, aggregate=aggregate)
+        )
+        gauge.set_function(lambda key=key: get_pool_stats()[key])
+    # Totals only grow: as counters they keep the counts of exited workers.
+    for key, name, documentation in (
+        (
+            "checkouts",
+            "db_pool_checkouts_total",
+            "Total database connection checkouts.",
+        ),
+        (
+            "wait_seconds_total",
+            "db_pool_wait_seconds_total",
+            "Total time spent waiting for a database connection.",
+        ),
+    ):
+        counter = registry.register(Counter(name, documentation))
+        counter.set_function(lambda key=key: get_pool_stats()[key])
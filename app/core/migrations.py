@@ -0,0 +1,38 @@
+import asyncio
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+
+ALEMBIC_INI = "alembic.ini"
+
+
+def upgrade_to_head() -> None:
+    command.upgrade(Config(ALEMBIC_INI), "head")
+
+
+async def _current_revisions() -> set:
+    engine = create_async_engine(settings.DATABASE_URL)
+    try:
+        async with engine.connect() as connection:
+            return await connection.run_sync(
+                lambda sync_conn: set(
+                    MigrationContext.configure(sync_conn).get_current_heads()
+                )
+            )
+    finally:
+        await engine.dispose()
+
+
+def check_schema_revision() -> None:
+    expected = set(ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_heads())
+    current = asyncio.run(_current_revisions())
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'base'}, expected "
+            f"{sorted(expected)}. Run `uv run migrate.py` before starting the API."
+        )
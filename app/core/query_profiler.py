@@ -0,0 +1,66 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_KEPT = 5
+
+
+class QueryStats:
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+
+    @property
+    def route(self) -> str:
+        if not self.scope:
+            return "-"
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "-")
+
+    def record(self, duration: float, statement: str) -> None:
+        self.count += 1
+        self.total_time += duration
+        if len(self.slowest) < SLOWEST_KEPT or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# Kept on the execution context: a failed statement takes it with it
+# instead of leaving a start time behind on the pooled connection.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    stats = query_stats.get()
+    if stats is not None:
+        stats.record(duration, statement)
+    if duration * 1000 >= settings.DB_SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query %.1f ms on %s: %s",
+            duration * 1000,
+            stats.route if stats else "-",
+            " ".join(statement.split())[:1000],
+        )
+
+
+def install_query_profiler(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
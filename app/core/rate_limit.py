@@ -0,0 +1,219 @@
+import asyncio
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, FrozenSet, Optional, Pattern, Tuple
+
+from sqlalchemy import case, extract, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import session as get_session_maker
+from app.models import RateLimitBucket, RateLimitSlot
+
+
+@dataclass(frozen=True)
+class RouteGroup:
+    name: str
+    methods: FrozenSet[str]
+    path: Pattern[str]
+    rate_per_minute: int
+    burst: int
+    max_in_flight: int
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and self.path.match(path) is not None
+
+
+ROUTE_GROUPS = (
+    # Everything that fans out to the agent service.
+    RouteGroup(
+        name="agent",
+        methods=frozenset({"POST"}),
+        path=re.compile(r"^/agent/sessions/"),
+        rate_per_minute=settings.RATE_LIMIT_AGENT_PER_MINUTE,
+        burst=settings.RATE_LIMIT_AGENT_BURST,
+        max_in_flight=settings.MAX_IN_FLIGHT_AGENT_CALLS_PER_USER,
+    ),
+    # Project creation and file uploads write to disk and call the agent.
+    RouteGroup(
+        name="upload",
+        methods=frozenset({"POST", "PATCH"}),
+        path=re.compile(r"^/projects(/\d+)?/?$"),
+        rate_per_minute=settings.RATE_LIMIT_UPLOAD_PER_MINUTE,
+        burst=settings.RATE_LIMIT_UPLOAD_BURST,
+        max_in_flight=settings.MAX_IN_FLIGHT_UPLOADS_PER_USER,
+    ),
+)
+
+
+def match_route_group(method: str, path: str) -> Optional[RouteGroup]:
+    for group in ROUTE_GROUPS:
+        if group.matches(method, path):
+            return group
+    return None
+
+
+@dataclass(frozen=True)
+class Rejection:
+    reason: str  # rate | in_flight
+    retry_after: float
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets and in-flight counters.
+
+    The in-memory backend is per process, so with several workers each one
+    enforces the full limits; the ``postgres`` backend shares them.
+    """
+
+    @abstractmethod
+    async def admit(
+        self, key: str, rate_per_minute: int, burst: int, limit: int
+    ) -> Optional[Rejection]:
+        """Take a token and an in-flight slot, or neither.
+
+        Returns ``None`` when admitted; the slot is then held until
+        ``release_slot``.
+        """
+
+    @abstractmethod
+    async def release_slot(self, key: str) -> None: ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._in_flight: Dict[str, int] = {}
+
+    async def admit(
+        self, key: str, rate_per_minute: int, burst: int, limit: int
+    ) -> Optional[Rejection]:
+        now = time.monotonic()
+        refill = rate_per_minute / 60.0
+        tokens, updated = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * refill)
+        in_flight = self._in_flight.get(key, 0)
+        if tokens < 1:
+            retry_after = (1 - tokens) / refill if refill else math.inf
+            rejection = Rejection("rate", retry_after)
+        elif in_flight >= limit:
+            rejection = Rejection("in_flight", 1.0)
+        else:
+            tokens -= 1
+            self._in_flight[key] = in_flight + 1
+            rejection = None
+        self._buckets[key] = (tokens, now)
+        # Least recently used keys are full buckets by now or close to it.
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return rejection
+
+    async def release_slot(self, key: str) -> None:
+        current = self._in_flight.get(key, 0) - 1
+        if current > 0:
+            self._in_flight[key] = current
+        else:
+            self._in_flight.pop(key, None)
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """Buckets and counters in unlogged tables.
+
+    Admission is one transaction of two upserts, release a single update.
+    A counter not touched for ``slot_ttl_seconds`` is reset on the next
+    request, so slots held by a killed worker do not lock a user out.
+    """
+
+    def __init__(self, slot_ttl_seconds: float):
+        self.slot_ttl = timedelta(seconds=slot_ttl_seconds)
+
+    async def admit(
+        self, key: str, rate_per_minute: int, burst: int, limit: int
+    ) -> Optional[Rejection]:
+        bucket = RateLimitBucket
+        slot = RateLimitSlot
+        refill = rate_per_minute / 60.0
+        now = func.now()
+        # In ON CONFLICT DO UPDATE the table's columns are the stored row.
+        refilled = func.least(
+            float(burst),
+            bucket.tokens + extract("epoch", now - bucket.updated_at) * refill,
+        )
+        stale = slot.updated_at < now - self.slot_ttl
+        async with get_session_maker() as db_session:
+            taken = await db_session.scalar(
+                insert(bucket)
+                .values(key=key, tokens=float(burst) - 1, updated_at=now)
+                .on_conflict_do_update(
+                    index_elements=[bucket.key],
+                    set_={"tokens": refilled - 1, "updated_at": now},
+                    where=refilled >= 1,
+                )
+                .returning(bucket.key)
+            )
+            if taken is None:
+                tokens = await db_session.scalar(
+                    select(refilled).where(bucket.key == key)
+                )
+                retry_after = (1 - (tokens or 0.0)) / refill if refill else math.inf
+                return Rejection("rate", retry_after)
+            acquired = await db_session.scalar(
+                insert(slot)
+                .values(key=key, in_flight=1, updated_at=now)
+                .on_conflict_do_update(
+                    index_elements=[slot.key],
+                    set_={
+                        "in_flight": case((stale, 1), else_=slot.in_flight + 1),
+                        "updated_at": now,
+                    },
+                    where=or_(slot.in_flight < limit, stale),
+                )
+                .returning(slot.key)
+            )
+            if acquired is None:
+                # Rolled back on close: the token is not spent.
+                return Rejection("in_flight", 1.0)
+            await db_session.commit()
+        return None
+
+    async def release_slot(self, key: str) -> None:
+        slot = RateLimitSlot
+        async with get_session_maker() as db_session:
+            await db_session.execute(
+                update(slot)
+                .where(slot.key == key)
+                .values(in_flight=func.greatest(slot.in_flight - 1, 0))
+            )
+            await db_session.commit()
+
+
+def create_rate_limit_backend(name: str) -> RateLimitBackend:
+    if name == "postgres":
+        return PostgresRateLimitBackend(settings.RATE_LIMIT_SLOT_TTL_SECONDS)
+    return InMemoryRateLimitBackend()
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def admit(self, user_id: int, group: RouteGroup) -> Optional[Rejection]:
+        return await self.backend.admit(
+            f"{group.name}:{user_id}",
+            group.rate_per_minute,
+            group.burst,
+            group.max_in_flight,
+        )
+
+    async def release(self, user_id: int, group: RouteGroup) -> None:
+        # Shielded so a cancelled request still frees its slot.
+        await asyncio.shield(self.backend.release_slot(f"{group.name}:{user_id}"))
+
+
+rate_limiter = RateLimiter(create_rate_limit_backend(settings.RATE_LIMIT_BACKEND))
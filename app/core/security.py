@@ -1,6 +1,9 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta, UTC
 from typing import Any, Union
-from jose import jwt
+import time
+import uuid
+from jose import jwt, jwk, JWTError
 from bcrypt import hashpw, gensalt, checkpw
 from app.core.config import settings
 
@@ -18,11 +21,19 @@ def create_refresh_token(subject: Union[str, Any]):
     expire = datetime.now(UTC) + timedelta(
         minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES
     )
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    jti = uuid.uuid4().hex
+    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh", "jti": jti}
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
-    return encoded_jwt, expire
+    return encoded_jwt, expire, jti
+
+
+def decode_refresh_token(token: str) -> dict:
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if payload.get("type") != "refresh" or not payload.get("jti"):
+        raise JWTError("Not a refresh token")
+    return payload
 
 
 def get_password_hash(password: str) -> str:
@@ -39,3 +50,35 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def is_expired(expire: int) -> bool:
     expire_dt = datetime.fromtimestamp(expire, UTC)
     return expire_dt < datetime.now(UTC)
+
+
+class TokenVerifier:
+    def __init__(self, secret_key: str, algorithm: str, cache_size: int = 1024):
+        self.algorithms = [algorithm]
+        self.key = jwk.construct(secret_key, algorithm)
+        self.cache_size = cache_size
+        # token -> (claims, exp); only tokens whose signature already verified
+        self._verified: OrderedDict = OrderedDict()
+
+    def verify(self, token: str) -> dict:
+        cached = self._verified.get(token)
+        if cached is not None:
+            claims, expire = cached
+            if expire > time.time():
+                self._verified.move_to_end(token)
+                return claims
+            del self._verified[token]
+
+        # jwt.decode checks the signature and exp; an expired token raises JWTError
+        claims = jwt.decode(token, self.key, algorithms=self.algorithms)
+        expire = claims.get("exp")
+        if expire is not None and self.cache_size > 0:
+            self._verified[token] = (claims, expire)
+            if len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return claims
+
+
+token_verifier = TokenVerifier(
+    settings.SECRET_KEY, settings.ALGORITHM, settings.TOKEN_VERIFY_CACHE_SIZE
+)
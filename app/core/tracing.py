@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class SpanContext:
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional["SpanContext"]:
+        if not value:
+            return None
+        parts = value.strip().split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            int(parts[1], 16), int(parts[2], 16)
+        except ValueError:
+            return None
+        return cls(parts[1], parts[2])
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict] = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.context = SpanContext(
+            parent.trace_id if parent else os.urandom(16).hex(), os.urandom(8).hex()
+        )
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_UNSET
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def to_dict(self) -> dict:
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status},
+        }
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class SpanExporter:
+    def __init__(self, stream, batch_size: int = 1):
+        self.stream = stream
+        self.batch_size = batch_size
+        self._pending: List[str] = []
+
+    def export(self, span: Span) -> None:
+        self._pending.append(json.dumps(span.to_dict(), default=str))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        try:
+            self.stream.write("\n".join(self._pending) + "\n")
+            self.stream.flush()
+        except Exception:
+            logger.exception("Failed to export spans")
+        self._pending.clear()
+
+
+def _create_exporter() -> Optional[SpanExporter]:
+    if settings.TRACING_EXPORTER == "console":
+        return SpanExporter(sys.stdout)
+    if settings.TRACING_EXPORTER == "file":
+        return SpanExporter(open(settings.TRACING_FILE_PATH, "a"), batch_size=64)
+    return None
+
+
+exporter = _create_exporter()
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: int = SPAN_KIND_INTERNAL,
+    parent: Optional[SpanContext] = None,
+    attributes: Optional[Dict] = None,
+):
+    if exporter is None:
+        yield None
+        return
+
+    if parent is None:
+        active = current_span.get()
+        parent = active.context if active else None
+    span = Span(name, kind, parent, attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.set_error(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        current_span.reset(token)
+        exporter.export(span)
+
+
+def trace_call(name: Optional[str] = None, kind: int = SPAN_KIND_INTERNAL):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name or func.__qualname__, kind):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def outgoing_headers(request_id: Optional[str] = None) -> Dict[str, str]:
+    span = current_span.get()
+    if span is None:
+        return {}
+    if request_id:
+        # The agent's webhook may land on any worker: it is matched to this
+        # call by the attribute in the trace backend, not in memory.
+        span.set_attribute("http.request_id", request_id)
+    return {"traceparent": span.context.traceparent}
+
+
+def tag_request(request_id: Optional[str]) -> None:
+    """Record the X-Request-ID of an agent webhook on the current span."""
+    span = current_span.get()
+    if span is None or not request_id:
+        return
+    span.set_attribute("http.request_id", request_id)
+
+
+def shutdown_tracing() -> None:
+    if exporter is not None:
+        exporter.flush()
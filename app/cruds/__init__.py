@@ -3,7 +3,12 @@ from .user import UserCRUD
 from .refresh_token import RefreshTokenCRUD
 from .project import ProjectCRUD
 from .project_file import ProjectFileCRUD
-from .agent_session import AgentSessionsCRUD, AgentSessionMessageCRUD, AgentSessionRequirementCRUD
+from .agent_session import (
+    AgentSessionsCRUD,
+    AgentSessionMessageCRUD,
+    AgentSessionRequirementCRUD,
+    AgentSessionResultChunkCRUD,
+)
 
 __all__ = (
     "UserCRUD",
@@ -13,5 +18,6 @@ __all__ = (
     "ProjectFileCRUD",
     "AgentSessionsCRUD",
     "AgentSessionMessageCRUD",
-    "AgentSessionRequirementCRUD"
+    "AgentSessionRequirementCRUD",
+    "AgentSessionResultChunkCRUD",
 )
@@ -1,18 +1,229 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, func, desc, case
-from typing import Optional
+from sqlalchemy import (
+    select,
+    update,
+    delete,
+    or_,
+    and_,
+    exists,
+    func,
+    desc,
+    case,
+    text,
+    Text,
+    cast,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased, raiseload
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
 
 from app.cruds import BaseCRUD
+from app.exceptions.custom import IncompleteResultException, NotFoundException
+from app.cruds.project import ProjectCRUD
 from app.models import (
     AgentSessions as AgentSessionsORM,
     AgentSessionMessage as AgentSessionsMessageORM,
-    SessionMessageTypeEnum, AgentSessionRequirement as AgentSessionRequirementORM,
+    SessionMessageTypeEnum,
+    AgentSessionRequirement as AgentSessionRequirementORM,
+    AgentSessionResultChunk as AgentSessionResultChunkORM,
+    SessionMessageRoleEnum,
+    SessionStatusEnum,
+    Project as ProjectORM,
 )
+from app.utils.dialogue import build_dialogue_snapshot, dumps
+
+AnswerMessage = aliased(AgentSessionsMessageORM)
 
 
 class AgentSessionsCRUD(BaseCRUD):
     model = AgentSessionsORM
 
+    # The session is part of the full project response, so every write
+    # invalidates the project's ETag in the same commit.
+    @classmethod
+    async def create(
+        cls, session: AsyncSession, obj: Dict[str, Any]
+    ) -> AgentSessionsORM:
+        if obj.get("project_id") is not None:
+            await ProjectCRUD.bump_version(session, obj["project_id"])
+        return await super().create(session, obj)
+
+    @classmethod
+    async def update(
+        cls, session: AsyncSession, obj: AgentSessionsORM, upd_obj: Dict[str, Any]
+    ) -> AgentSessionsORM:
+        if obj.project_id is not None:
+            await ProjectCRUD.bump_version(session, obj.project_id)
+        return await super().update(session, obj, upd_obj)
+
+    @classmethod
+    async def before_commit(cls, session: AsyncSession, obj: AgentSessionsORM) -> None:
+        if obj.id is None:
+            await session.flush()
+        await cls.refresh_snapshot(session, obj.id)
+
+    @classmethod
+    async def refresh_snapshot(cls, session: AsyncSession, _id: int) -> None:
+        """Rebuild the stored dialogue snapshot; committed with the caller's write."""
+        # Row lock before pending messages are inserted: a concurrent writer
+        # then rebuilds after our commit and sees our messages, and message
+        # ids of a session follow commit order (see get_after). NO KEY UPDATE
+        # does not conflict with the FK checks of message inserts.
+        await cls.lock(session, _id)
+        await session.flush()
+        state = await cls.get_state(session, _id)
+        if state is None:
+            return
+        message = AgentSessionsMessageORM
+        # Plain rows: instances in the identity map may have unloaded server defaults.
+        messages = await session.execute(
+            select(
+                message.id,
+                message.parent_message_id,
+                message.content,
+                message.message_type,
+                message.is_skipped,
+                message.question_number,
+                message.explanation,
+                message.created_at,
+            ).where(message.session_id == _id)
+        )
+        requirement_id = await session.scalar(
+            select(AgentSessionRequirementORM.id).where(
+                AgentSessionRequirementORM.session_id == _id
+            )
+        )
+        # The streamed part of the result is added on read: see load_snapshot.
+        snapshot = build_dialogue_snapshot(
+            _id,
+            state.status,
+            state.current_iteration,
+            messages.all(),
+            requirement_id,
+        )
+        await session.execute(
+            update(cls.model)
+            .where(cls.model.id == _id)
+            .values(
+                snapshot=orjson.loads(dumps(snapshot)),
+                snapshot_version=cls.model.snapshot_version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    async def create_with_dialogue(
+        cls,
+        session: AsyncSession,
+        obj: Dict[str, Any],
+        dialogue: List[Tuple[str, str]],
+    ) -> AgentSessionsORM:
+        """Create a session seeded with (question, answer) pairs in one transaction."""
+        db_obj = cls.model(**obj)
+        session.add(db_obj)
+        await session.flush()
+
+        message = AgentSessionsMessageORM
+        question_ids = await session.scalars(
+            insert(message).returning(message.id, sort_by_parameter_order=True),
+            [
+                {
+                    "session_id": db_obj.id,
+                    "role": SessionMessageRoleEnum.AGENT,
+                    "content": question,
+                    "message_type": SessionMessageTypeEnum.QUESTION,
+                }
+                for question, _ in dialogue
+            ],
+        )
+        await session.execute(
+            insert(message),
+            [
+                {
+                    "session_id": db_obj.id,
+                    "role": SessionMessageRoleEnum.USER,
+                    "content": answer,
+                    "message_type": SessionMessageTypeEnum.ANSWER,
+                    "parent_message_id": question_id,
+                }
+                for question_id, (_, answer) in zip(question_ids.all(), dialogue)
+            ],
+        )
+        await cls.refresh_snapshot(session, db_obj.id)
+        await session.commit()
+        # Column attributes only: the response does not need the messages.
+        await session.refresh(
+            db_obj,
+            [
+                "id",
+                "project_id",
+                "external_session_id",
+                "user_goal",
+                "status",
+                "current_iteration",
+            ],
+        )
+        return db_obj
+
+    @classmethod
+    async def apply_questions(
+        cls,
+        session: AsyncSession,
+        obj: AgentSessionsORM,
+        upd_obj: Dict[str, Any],
+        questions: List[Dict[str, Any]],
+    ) -> None:
+        """Update the session and store an iteration's questions in one transaction.
+
+        Questions already stored for the session (by ``question_external_id``)
+        only get their status updated. The snapshot is rebuilt once per batch.
+        """
+        # Locked before the questions get their ids, as in refresh_snapshot.
+        await cls.lock(session, obj.id)
+        if obj.project_id is not None:
+            await ProjectCRUD.bump_version(session, obj.project_id)
+        for key, value in upd_obj.items():
+            setattr(obj, key, value)
+        session.add(obj)
+
+        message = AgentSessionsMessageORM
+        # The last copy wins if the agent repeats a question in one batch.
+        by_external_id = {q["question_external_id"]: q for q in questions}
+        existing = dict(
+            (
+                await session.execute(
+                    select(message.question_external_id, message.id).where(
+                        message.session_id == obj.id,
+                        message.question_external_id.in_(by_external_id),
+                    )
+                )
+            ).all()
+        )
+        updates = [
+            {"id": existing[external_id], "question_status": q["question_status"]}
+            for external_id, q in by_external_id.items()
+            if external_id in existing
+        ]
+        if updates:
+            await session.execute(update(message), updates)
+        created = [
+            {
+                **q,
+                "session_id": obj.id,
+                "role": SessionMessageRoleEnum.AGENT,
+                "message_type": SessionMessageTypeEnum.QUESTION,
+            }
+            for external_id, q in by_external_id.items()
+            if external_id not in existing
+        ]
+        if created:
+            await session.execute(insert(message), created)
+        await cls.refresh_snapshot(session, obj.id)
+        await session.commit()
+
     @classmethod
     async def get_by_external_id(
         cls, session: AsyncSession, external_session_id: str
@@ -31,6 +242,100 @@ class AgentSessionsCRUD(BaseCRUD):
         result = await session.execute(query)
         return result.scalar_one_or_none()
 
+    @classmethod
+    async def get_state(cls, session: AsyncSession, _id: int):
+        """Status and iteration of a session without loading its messages."""
+        query = select(cls.model.status, cls.model.current_iteration).where(
+            cls.model.id == _id
+        )
+        result = await session.execute(query)
+        return result.first()
+
+    @classmethod
+    async def get_owner(cls, session: AsyncSession, _id: int):
+        """Row with the owning ``user_id``, NULL for sessions without a project."""
+        query = (
+            select(ProjectORM.user_id)
+            .select_from(cls.model)
+            .outerjoin(ProjectORM, ProjectORM.id == cls.model.project_id)
+            .where(cls.model.id == _id)
+        )
+        result = await session.execute(query)
+        return result.first()
+
+    @classmethod
+    async def bump_snapshot_version(cls, session: AsyncSession, _id: int) -> None:
+        """Mark the snapshot changed without rebuilding it."""
+        await session.execute(
+            update(cls.model)
+            .where(cls.model.id == _id)
+            .values(snapshot_version=cls.model.snapshot_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    async def get_snapshot(cls, session: AsyncSession, _id: int):
+        """Stored snapshot as JSON text, its version, the owning ``user_id``
+        and whether part of the result has been streamed."""
+        chunk = AgentSessionResultChunkORM
+        query = (
+            select(
+                cls.model.snapshot_version,
+                cast(cls.model.snapshot, Text).label("snapshot"),
+                ProjectORM.user_id,
+                exists()
+                .where(chunk.session_id == cls.model.id)
+                .label("has_result_chunks"),
+            )
+            .select_from(cls.model)
+            .outerjoin(ProjectORM, ProjectORM.id == cls.model.project_id)
+            .where(cls.model.id == _id)
+        )
+        result = await session.execute(query)
+        return result.first()
+
+    @classmethod
+    async def get_stuck(
+        cls, session: AsyncSession, before: datetime, after_id: int, limit: int
+    ):
+        """Rows (id, external_session_id) of sessions in PROCESSING since ``before``."""
+        query = (
+            select(cls.model.id, cls.model.external_session_id)
+            .where(
+                cls.model.status == SessionStatusEnum.PROCESSING,
+                cls.model.updated_at < before,
+                cls.model.external_session_id.is_not(None),
+                cls.model.id > after_id,
+            )
+            .order_by(cls.model.id)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return result.all()
+
+    @classmethod
+    async def lock(cls, session: AsyncSession, _id: int) -> None:
+        """Lock the session row until the next commit."""
+        await session.execute(
+            select(cls.model.id)
+            .where(cls.model.id == _id)
+            .with_for_update(key_share=True)
+        )
+
+    @classmethod
+    async def get_for_update(
+        cls, session: AsyncSession, _id: int
+    ) -> Optional[AgentSessionsORM]:
+        """Lock the session row until the next commit, without its messages."""
+        query = (
+            select(cls.model)
+            .where(cls.model.id == _id)
+            .options(raiseload("*"))
+            .with_for_update(key_share=True)
+        )
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
     @classmethod
     async def get_last(cls, session: AsyncSession) -> Optional[AgentSessionsORM]:
         query = (
@@ -44,7 +349,6 @@ class AgentSessionsCRUD(BaseCRUD):
         return obj
 
 
-
 class AgentSessionMessageCRUD(BaseCRUD):
     model = AgentSessionsMessageORM
 
@@ -56,6 +360,32 @@ class AgentSessionMessageCRUD(BaseCRUD):
         result = await session.execute(query)
         return result.scalar_one_or_none()
 
+    @classmethod
+    async def before_commit(
+        cls, session: AsyncSession, obj: AgentSessionsMessageORM
+    ) -> None:
+        await AgentSessionsCRUD.refresh_snapshot(session, obj.session_id)
+
+    @classmethod
+    async def get_after(
+        cls, session: AsyncSession, session_id: int, after_id: int, limit: int = 500
+    ) -> List[AgentSessionsMessageORM]:
+        """Messages of a session with ids above ``after_id``, in id order.
+
+        Every writer inserts a session's messages while holding its row lock,
+        so a message committed later never gets a lower id than one already
+        read: the id is a safe cursor.
+        """
+        query = (
+            select(cls.model)
+            .where(cls.model.session_id == session_id, cls.model.id > after_id)
+            .options(raiseload("*"))
+            .order_by(cls.model.id)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
     @classmethod
     async def answer_exists(
         cls,
@@ -70,13 +400,203 @@ class AgentSessionMessageCRUD(BaseCRUD):
         )
         return result.first() is not None
 
+    @classmethod
+    async def get_questions_for_answers(
+        cls, session: AsyncSession, session_id: int, question_ids: List[int]
+    ):
+        """Session status and owner plus the requested questions, in one query.
+
+        Returns no rows if the session does not exist and a single row with
+        ``question_id`` NULL if none of the questions belong to it. ``user_id``
+        is NULL for sessions without a project.
+        """
+        answered = exists().where(
+            AnswerMessage.parent_message_id == cls.model.id,
+            AnswerMessage.message_type == SessionMessageTypeEnum.ANSWER,
+        )
+        query = (
+            select(
+                AgentSessionsORM.status.label("session_status"),
+                AgentSessionsORM.external_session_id,
+                ProjectORM.user_id,
+                cls.model.id.label("question_id"),
+                cls.model.question_external_id,
+                answered.label("answered"),
+            )
+            .select_from(AgentSessionsORM)
+            .outerjoin(ProjectORM, ProjectORM.id == AgentSessionsORM.project_id)
+            .outerjoin(
+                cls.model,
+                and_(
+                    cls.model.session_id == AgentSessionsORM.id,
+                    cls.model.id.in_(question_ids),
+                    cls.model.message_type == SessionMessageTypeEnum.QUESTION,
+                ),
+            )
+            .where(AgentSessionsORM.id == session_id)
+        )
+        result = await session.execute(query)
+        return result.all()
+
+    @classmethod
+    async def create_answers(
+        cls, session: AsyncSession, objs: List[Dict[str, Any]]
+    ) -> Optional[list]:
+        """Insert answers in one statement, all or nothing.
+
+        Returns ``None`` if any question already has an answer (the partial
+        unique index settles concurrent submits). Rows come back as plain
+        tuples so nothing is expired by the commit.
+        """
+        # Locked before the answers get their ids, as in refresh_snapshot.
+        for session_id in sorted({obj["session_id"] for obj in objs}):
+            await AgentSessionsCRUD.lock(session, session_id)
+        result = await session.execute(
+            insert(cls.model)
+            .values(objs)
+            .on_conflict_do_nothing(
+                index_elements=[cls.model.parent_message_id],
+                index_where=text("message_type = 'ANSWER'"),
+            )
+            .returning(*cls.model.__table__.c)
+        )
+        rows = result.all()
+        if len(rows) != len(objs):
+            await session.rollback()
+            return None
+        for session_id in {row.session_id for row in rows}:
+            await AgentSessionsCRUD.refresh_snapshot(session, session_id)
+        await session.commit()
+        return rows
+
+
 class AgentSessionRequirementCRUD(BaseCRUD):
     model = AgentSessionRequirementORM
 
+    @classmethod
+    async def create(
+        cls, session: AsyncSession, obj: Dict[str, Any]
+    ) -> AgentSessionRequirementORM:
+        await ProjectCRUD.bump_version_for_session(session, obj["session_id"])
+        return await super().create(session, obj)
+
+    @classmethod
+    async def update(
+        cls,
+        session: AsyncSession,
+        obj: AgentSessionRequirementORM,
+        upd_obj: Dict[str, Any],
+    ) -> AgentSessionRequirementORM:
+        await ProjectCRUD.bump_version_for_session(session, obj.session_id)
+        return await super().update(
+            session, obj, {**upd_obj, "version": cls.model.version + 1}
+        )
+
+    @classmethod
+    async def before_commit(
+        cls, session: AsyncSession, obj: AgentSessionRequirementORM
+    ) -> None:
+        # The snapshot only refers to the requirement by id.
+        if obj in session.new:
+            await AgentSessionsCRUD.refresh_snapshot(session, obj.session_id)
+
+    @classmethod
+    async def get_version(cls, session: AsyncSession, _id: int):
+        query = select(
+            cls.model.version,
+            func.coalesce(cls.model.updated_at, cls.model.created_at),
+        ).where(cls.model.id == _id)
+        result = await session.execute(query)
+        row = result.first()
+        if row is None:
+            raise NotFoundException(cls.model.__tablename__, "id", _id)
+        return row
+
     @classmethod
     async def get_by_session_id(
-            cls, session: AsyncSession, session_id: int
+        cls, session: AsyncSession, session_id: int
     ) -> Optional[AgentSessionRequirementORM]:
         query = select(cls.model).where(cls.model.session_id == session_id)
         result = await session.execute(query)
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+
+
+class AgentSessionResultChunkCRUD(BaseCRUD):
+    model = AgentSessionResultChunkORM
+
+    @classmethod
+    async def append(
+        cls, session: AsyncSession, session_id: int, chunk_index: int, content: str
+    ) -> bool:
+        """Buffer a chunk; ``False`` if that index was already received.
+
+        Only the snapshot version changes: the partial result is read from
+        the buffer, so a long stream costs one insert per chunk.
+        """
+        result = await session.execute(
+            insert(cls.model)
+            .values(session_id=session_id, chunk_index=chunk_index, content=content)
+            .on_conflict_do_nothing(
+                index_elements=[cls.model.session_id, cls.model.chunk_index]
+            )
+            .returning(cls.model.chunk_index)
+        )
+        if result.first() is None:
+            await session.rollback()
+            return False
+        await AgentSessionsCRUD.bump_snapshot_version(session, session_id)
+        await session.commit()
+        return True
+
+    @classmethod
+    async def get_from(
+        cls, session: AsyncSession, session_id: int, chunk_index: int
+    ) -> List[Tuple[int, str]]:
+        """(index, content) of the chunks from ``chunk_index`` up to the first gap."""
+        query = (
+            select(cls.model.chunk_index, cls.model.content)
+            .where(
+                cls.model.session_id == session_id,
+                cls.model.chunk_index >= chunk_index,
+            )
+            .order_by(cls.model.chunk_index)
+        )
+        result = await session.execute(query)
+        chunks = []
+        for row in result.all():
+            if row.chunk_index != chunk_index + len(chunks):
+                break
+            chunks.append((row.chunk_index, row.content))
+        return chunks
+
+    @classmethod
+    async def get_partial_result(
+        cls, session: AsyncSession, session_id: int
+    ) -> Optional[str]:
+        chunks = await cls.get_from(session, session_id, 0)
+        return "".join(content for _, content in chunks) if chunks else None
+
+    @classmethod
+    async def pop_result(cls, session: AsyncSession, session_id: int) -> Optional[str]:
+        """Assemble every buffered chunk in order and clear the buffer, uncommitted.
+
+        Raises ``IncompleteResultException`` if an index before the last one
+        received is missing; the caller's rollback then keeps the buffer.
+        """
+        result = await session.execute(
+            delete(cls.model)
+            .where(cls.model.session_id == session_id)
+            .returning(cls.model.chunk_index, cls.model.content)
+        )
+        chunks = sorted(result.all())
+        for expected, (chunk_index, _) in enumerate(chunks):
+            if chunk_index != expected:
+                raise IncompleteResultException(session_id, expected)
+        return "".join(content for _, content in chunks) if chunks else None
+
+    @classmethod
+    async def clear(cls, session: AsyncSession, session_id: int) -> None:
+        """Drop the buffered chunks, uncommitted."""
+        await session.execute(
+            delete(cls.model).where(cls.model.session_id == session_id)
+        )
@@ -2,27 +2,68 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Type, TypeVar, Generic, Dict, Any
 from pydantic import BaseModel
+from functools import wraps
+import inspect
 
+from app.core.tracing import start_span
 from app.exceptions.custom import NotFoundException
 
 T = TypeVar("T")
 
 
+def traced(func):
+    @wraps(func)
+    async def wrapper(cls, *args, **kwargs):
+        with start_span(
+            f"{cls.__name__}.{func.__name__}",
+            attributes={"db.table": cls.model.__tablename__},
+        ):
+            return await func(cls, *args, **kwargs)
+
+    wrapper.traced = True
+    return wrapper
+
+
+def _is_traced(owner: type, name: str) -> bool:
+    attr = inspect.getattr_static(owner, name, None)
+    return isinstance(attr, classmethod) and getattr(attr.__func__, "traced", False)
+
+
 class BaseCRUD(Generic[T]):
     model: Type[T]
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, attr in list(vars(cls).items()):
+            if not isinstance(attr, classmethod) or not inspect.iscoroutinefunction(
+                attr.__func__
+            ):
+                continue
+            # An override of a traced method reaches it through super(): one
+            # span is enough.
+            if any(_is_traced(base, name) for base in cls.__bases__):
+                continue
+            setattr(cls, name, classmethod(traced(attr.__func__)))
+
     @classmethod
+    @traced
     async def create(cls, session: AsyncSession, obj: Dict[str, Any]) -> T:
         obj_data = {
             key: value for key, value in obj.items() if not isinstance(value, list)
         }
         db_obj = cls.model(**obj_data)
         session.add(db_obj)
+        await cls.before_commit(session, db_obj)
         await session.commit()
         await session.refresh(db_obj)
         return db_obj
 
     @classmethod
+    async def before_commit(cls, session: AsyncSession, obj: T) -> None:
+        """Hook for writes that must land in the same transaction as ``obj``."""
+
+    @classmethod
+    @traced
     async def get_by_id(cls, session: AsyncSession, _id: int) -> T:
         query = select(cls.model).where(cls.model.id == _id)
         result = await session.execute(query)
@@ -32,15 +73,18 @@ class BaseCRUD(Generic[T]):
         return obj
 
     @classmethod
+    @traced
     async def update(cls, session: AsyncSession, obj: T, upd_obj: Dict[str, Any]) -> T:
         for key, value in upd_obj.items():
             setattr(obj, key, value)
         session.add(obj)
+        await cls.before_commit(session, obj)
         await session.commit()
         await session.refresh(obj)
         return obj
 
     @classmethod
+    @traced
     async def remove(cls, session: AsyncSession, obj: T) -> None:
         await session.delete(obj)
         await session.commit()
@@ -1,12 +1,13 @@
-from sqlalchemy import select, or_, func, desc, case
+from sqlalchemy import select, update, or_, and_, func, desc, case, literal
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from sqlalchemy.orm import selectinload
 
 from app.exceptions.custom import NotFoundException
 from app.cruds import BaseCRUD
 from app.models import Project as ProjectORM, AgentSessions
 from app.models import User as UserORM
+from app.schemas.project import ProjectShallow
 
 
 class ProjectCRUD(BaseCRUD):
@@ -20,32 +21,91 @@ class ProjectCRUD(BaseCRUD):
         search: str,
         offset: int = 0,
         limit: int = 10,
-    ) -> Tuple[List[ProjectORM], int]:
-        base_query = select(cls.model).where(cls.model.user_id == user.id)
+        after: Optional[Tuple[int, int]] = None,
+    ) -> Tuple[List[ProjectShallow], int, Optional[Tuple[int, int]]]:
+        # Column projection keeps the list to one statement: loading entities
+        # would fire the selectin loaders for files, user and session.
+        columns = (
+            cls.model.id,
+            cls.model.status,
+            cls.model.title,
+            cls.model.created_at,
+            cls.model.updated_at,
+        )
+        filters = [cls.model.user_id == user.id]
 
         if search:
-            base_query = base_query.where(
+            filters.append(
                 or_(
                     cls.model.title.ilike(f"%{search}%"),
                     cls.model.description.ilike(f"%{search}%"),
                 )
             )
 
-        count_query = select(func.count()).select_from(base_query.subquery())
-        total_count = await session.scalar(count_query)
+        # Relevance only exists for a search; without one the order is by id
+        # alone and the cursor's priority slot stays 0.
+        if search:
+            priority = case((cls.model.title.ilike(f"%{search}%"), 1), else_=0)
+            order_by = (desc(priority), cls.model.id.desc())
+        else:
+            priority = literal(0)
+            order_by = (cls.model.id.desc(),)
+
+        if after is None:
+            total = func.count().over()
+            query = select(*columns, priority.label("priority"), total.label("total"))
+            query = query.where(*filters).offset(offset)
+        else:
+            # Keyset mode: the window count would only see rows past the
+            # cursor, so the total comes from a scalar subquery instead.
+            total = (
+                select(func.count()).select_from(cls.model).where(*filters)
+            ).scalar_subquery()
+            after_priority, after_id = after
+            if search:
+                position = or_(
+                    priority < after_priority,
+                    and_(priority == after_priority, cls.model.id < after_id),
+                )
+            else:
+                position = cls.model.id < after_id
+            query = select(
+                *columns, priority.label("priority"), total.label("total")
+            ).where(*filters, position)
 
-        priority = case((cls.model.title.ilike(f"%{search}%"), 1), else_=0)
+        # One extra row tells whether another page exists, so a full last
+        # page does not hand out a cursor to an empty one.
+        query = query.order_by(*order_by).limit(limit + 1)
 
-        paginated_query = (
-            base_query.order_by(desc(priority), cls.model.id.desc())
-            .offset(offset)
-            .limit(limit)
-        )
+        result = await session.execute(query)
+        rows = result.all()
 
-        result = await session.execute(paginated_query)
-        items = result.scalars().all()
+        if not rows:
+            if after is None and offset == 0:
+                return [], 0, None
+            total_count = await session.scalar(
+                select(func.count()).select_from(cls.model).where(*filters)
+            )
+            return [], total_count, None
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = [
+            ProjectShallow(
+                id=row.id,
+                status=row.status,
+                title=row.title,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+            )
+            for row in rows
+        ]
+        total_count = rows[0].total
+        next_key = None
+        if has_more:
+            next_key = (rows[-1].priority, rows[-1].id)
 
-        return items, total_count
+        return items, total_count, next_key
 
     @classmethod
     async def get_by_external_id(
@@ -62,6 +122,49 @@ class ProjectCRUD(BaseCRUD):
         obj = result.scalar_one_or_none()
         return obj
 
+    @classmethod
+    async def update(
+        cls, session: AsyncSession, obj: ProjectORM, upd_obj: Dict[str, Any]
+    ) -> ProjectORM:
+        return await super().update(
+            session, obj, {**upd_obj, "version": cls.model.version + 1}
+        )
+
+    @classmethod
+    async def bump_version(cls, session: AsyncSession, project_id: int) -> None:
+        """Invalidate the project's ETag; committed with the caller's write."""
+        await session.execute(
+            update(cls.model)
+            .where(cls.model.id == project_id)
+            .values(version=cls.model.version + 1, updated_at=cls.model.updated_at)
+        )
+
+    @classmethod
+    async def bump_version_for_session(
+        cls, session: AsyncSession, agent_session_id: int
+    ) -> None:
+        project_id = (
+            select(AgentSessions.project_id)
+            .where(AgentSessions.id == agent_session_id)
+            .scalar_subquery()
+        )
+        await session.execute(
+            update(cls.model)
+            .where(cls.model.id == project_id)
+            .values(version=cls.model.version + 1, updated_at=cls.model.updated_at)
+        )
+
+    @classmethod
+    async def get_version(cls, session: AsyncSession, _id: int):
+        query = select(
+            cls.model.user_id, cls.model.version, cls.model.updated_at
+        ).where(cls.model.id == _id)
+        result = await session.execute(query)
+        row = result.first()
+        if row is None:
+            raise NotFoundException(cls.model.__tablename__, "id", _id)
+        return row
+
     @classmethod
     async def get_full_by_id(cls, session: AsyncSession, _id: int):
         query = (
@@ -69,8 +172,7 @@ class ProjectCRUD(BaseCRUD):
             .where(cls.model.id == _id)
             .options(
                 selectinload(cls.model.files),
-                selectinload(cls.model.session)
-                .selectinload(AgentSessions.requirement)
+                selectinload(cls.model.session).selectinload(AgentSessions.requirement),
             )
         )
 
@@ -80,4 +182,4 @@ class ProjectCRUD(BaseCRUD):
         if obj is None:
             raise NotFoundException(cls.model.__tablename__, "id", _id)
 
-        return obj
\ No newline at end of file
+        return obj
@@ -1,6 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict
+
 from app.cruds import BaseCRUD
+from app.cruds.project import ProjectCRUD
 from app.models import ProjectFile as ProjectFileORM
 
 
 class ProjectFileCRUD(BaseCRUD):
     model = ProjectFileORM
+
+    @classmethod
+    async def create(cls, session: AsyncSession, obj: Dict[str, Any]) -> ProjectFileORM:
+        await ProjectCRUD.bump_version(session, obj["project_id"])
+        return await super().create(session, obj)
@@ -1,3 +1,5 @@
+from datetime import datetime, UTC
+from typing import Optional
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.cruds import BaseCRUD
@@ -8,14 +10,42 @@ class RefreshTokenCRUD(BaseCRUD):
     model = RefreshTokenORM
 
     @classmethod
-    async def get_by_token(cls, session: AsyncSession, token: str) -> RefreshTokenORM:
-        query = select(cls.model).where(cls.model.token == token)
-        result = await session.execute(query)
-        obj = result.scalar_one_or_none()
-        return obj
+    async def consume(
+        cls, session: AsyncSession, jti: str, user_id: int
+    ) -> Optional[int]:
+        """Delete an active token in one statement; the caller commits.
+
+        Returns the owner's id, or ``None`` if the token is unknown, expired
+        or already used. The row lock makes concurrent uses of one token
+        wait for each other, so only the first finds the row.
+        """
+        result = await session.execute(
+            delete(cls.model)
+            .where(
+                cls.model.jti == jti,
+                cls.model.user_id == user_id,
+                cls.model.expires_at > datetime.now(UTC),
+            )
+            .returning(cls.model.user_id)
+        )
+        return result.scalar_one_or_none()
 
     @classmethod
     async def remove_by_user(cls, session: AsyncSession, user_id: int) -> None:
         query = delete(cls.model).where(cls.model.user_id == user_id)
         await session.execute(query)
         await session.commit()
+
+    @classmethod
+    async def remove_expired_batch(cls, session: AsyncSession, batch_size: int) -> int:
+        expired_ids = (
+            select(cls.model.id)
+            .where(cls.model.expires_at <= datetime.now(UTC))
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            delete(cls.model).where(cls.model.id.in_(expired_ids))
+        )
+        await session.commit()
+        return result.rowcount
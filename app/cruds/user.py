@@ -1,5 +1,7 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from typing import Optional
 from pydantic import EmailStr
 from app.cruds import BaseCRUD
 from app.models import User as UserORM
@@ -14,3 +16,11 @@ class UserCRUD(BaseCRUD):
         result = await session.execute(query)
         obj = result.scalar_one_or_none()
         return obj
+
+    @classmethod
+    async def get_for_auth(cls, session: AsyncSession, _id: int) -> Optional[UserORM]:
+        # Runs on every authenticated request: skip the selectin loads of all
+        # projects and refresh tokens, which no endpoint reads from current_user.
+        query = select(cls.model).where(cls.model.id == _id).options(raiseload("*"))
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
@@ -1,5 +1,13 @@
-from .current_user import get_current_user
+from .current_user import get_current_user, get_current_read_user, authenticate_token
 from .file import get_text_files
 from .agent import get_agent
+from .read_db import get_read_db
 
-__all__ = ("get_current_user", "get_text_files", "get_agent")
+__all__ = (
+    "get_current_user",
+    "get_current_read_user",
+    "authenticate_token",
+    "get_text_files",
+    "get_agent",
+    "get_read_db",
+)
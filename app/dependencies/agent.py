@@ -1,10 +1,26 @@
+from fastapi import Request
+
 from app.core.config import settings
 from app.services import AgentService
+from app.services.resilience import Deadline
+
+
+def _deadline_budget(request: Request) -> float:
+    budget = settings.AGENT_DEADLINE_SECONDS
+    # Clients may shorten (never extend) the budget, e.g. to match their own timeout.
+    requested = request.headers.get("X-Request-Timeout")
+    if requested:
+        try:
+            budget = min(budget, max(float(requested), 0.0))
+        except ValueError:
+            pass
+    return budget
 
 
-async def get_agent():
+async def get_agent(request: Request):
     service = AgentService(
         url=settings.EXTERNAL_API_URL,
         callback_url=settings.CALLBACK_URL,
+        deadline=Deadline(_deadline_budget(request)),
     )
     yield service
@@ -1,40 +1,27 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import jwt, JWTError
+from jose import JWTError
 
-from app.core import is_expired, get_db
-from app.core.config import settings
+from app.core import token_verifier, get_db
 from app.cruds import UserCRUD
+from app.dependencies.read_db import get_read_db
 
 auth_scheme = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(auth_scheme),
-    session: AsyncSession = Depends(get_db),
-):
+async def authenticate_token(session: AsyncSession, token: str):
+    """Resolve an access token to an active user, as for HTTP and WebSocket routes."""
     credential_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    if not credentials:
-        raise credential_exception
-
     try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-
-        expire_time = payload.get("exp")
+        payload = token_verifier.verify(token)
         user_id = int(payload.get("sub"))
 
-        if is_expired(expire_time):
-            raise credential_exception
-        user = await UserCRUD.get_by_id(session, user_id)
+        user = await UserCRUD.get_for_auth(session, user_id)
         if not user:
             raise credential_exception
         if not user.is_active:
@@ -45,3 +32,29 @@ async def get_current_user(
 
     except JWTError:
         raise credential_exception
+
+
+def _credentials(credentials: HTTPAuthorizationCredentials) -> str:
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return credentials.credentials
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    session: AsyncSession = Depends(get_db),
+):
+    return await authenticate_token(session, _credentials(credentials))
+
+
+async def get_current_read_user(
+    credentials: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    session: AsyncSession = Depends(get_read_db),
+):
+    """``get_current_user`` for read-only endpoints: the user is looked up on
+    their read session, so a replica read checks out one connection."""
+    return await authenticate_token(session, _credentials(credentials))
@@ -0,0 +1,15 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db, get_read_session_maker, session as primary
+
+
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    session_maker = get_read_session_maker()
+    if session_maker is primary:
+        # No replica configured or the client wrote recently: reuse the
+        # request's primary session instead of opening another connection.
+        yield db
+        return
+    async with session_maker() as new_session:
+        yield new_session
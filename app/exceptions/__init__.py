@@ -1,9 +1,10 @@
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import IntegrityError
 
-from app.exceptions.custom import NotFoundException
+from app.exceptions.custom import IncompleteResultException, NotFoundException
 
 
 def init_exception_handlers(app: FastAPI):
@@ -27,13 +28,28 @@ def init_exception_handlers(app: FastAPI):
             },
         )
 
+    @app.exception_handler(IncompleteResultException)
+    async def incomplete_result_exception_handler(
+        request: Request, exc: IncompleteResultException
+    ):
+        return JSONResponse(
+            status_code=409,
+            content={
+                "message": "Error: Conflict",
+                "detail": f"Result chunk {exc.missing_chunk} of session {exc.session_id} has not been received",
+            },
+        )
+
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(
         request: Request, exc: RequestValidationError
     ):
         return JSONResponse(
             status_code=422,
-            content={"message": "Error: Validation Error", "detail": exc.errors()},
+            content={
+                "message": "Error: Validation Error",
+                "detail": jsonable_encoder(exc.errors()),
+            },
         )
 
     @app.exception_handler(Exception)
@@ -52,6 +68,7 @@ def init_exception_handlers(app: FastAPI):
             404: "Error: Not Found",
             409: "Error: Conflict",
             422: "Error: Validation Error",
+            429: "Error: Too Many Requests",
             500: "Error: Internal Server Error",
         }
         return JSONResponse(
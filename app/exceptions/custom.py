@@ -6,3 +6,9 @@ class NotFoundException(Exception):
         self.model = model
         self.field = field
         self.value = value
+
+
+class IncompleteResultException(Exception):
+    def __init__(self, session_id: int, missing_chunk: int):
+        self.session_id = session_id
+        self.missing_chunk = missing_chunk
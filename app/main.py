@@ -1,12 +1,55 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+import asyncio
 import logging
 
 from app.core.config import settings
+from app.core.database import get_pool_stats
+from app.core.metrics import registry, register_pool_metrics
+from app.core.tracing import shutdown_tracing
 from app.api import auth, user, projects, agent, requirements
 from app.exceptions import init_exception_handlers
+from app.middlewares import (
+    MetricsMiddleware,
+    QueryProfileMiddleware,
+    RateLimitMiddleware,
+    ReadYourWritesMiddleware,
+    TracingMiddleware,
+)
+from app.services import (
+    connection_manager,
+    run_refresh_token_sweeper,
+    run_session_reconciler,
+    session_events,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [
+        asyncio.create_task(run_refresh_token_sweeper()),
+        asyncio.create_task(run_session_reconciler()),
+        asyncio.create_task(session_events.listen()),
+        asyncio.create_task(connection_manager.run_heartbeats()),
+        asyncio.create_task(
+            registry.run_dumper(settings.METRICS_DUMP_INTERVAL_SECONDS)
+        ),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    # Let them unwind (roll back, close connections) before the pool is gone.
+    await asyncio.gather(*tasks, return_exceptions=True)
+    shutdown_tracing()
+
 
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
+if settings.DATABASE_REPLICA_URL:
+    app.add_middleware(ReadYourWritesMiddleware)
+# Rate limiting sits inside CORS so browsers can read the 429
+app.add_middleware(RateLimitMiddleware)
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -15,6 +58,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Metrics
+if settings.DB_QUERY_PROFILING:
+    app.add_middleware(QueryProfileMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
+register_pool_metrics(get_pool_stats)
 # Exceptions
 init_exception_handlers(app)
 
@@ -37,3 +86,15 @@ logger = logging.getLogger(__name__)
 @app.get("/")
 async def root():
     return {"project": settings.PROJECT_NAME, "status": "active"}
+
+
+@app.get("/health/db-pool")
+async def db_pool_status():
+    return get_pool_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
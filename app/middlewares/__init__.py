@@ -0,0 +1,13 @@
+from .metrics import MetricsMiddleware
+from .query_profile import QueryProfileMiddleware
+from .rate_limit import RateLimitMiddleware
+from .read_your_writes import ReadYourWritesMiddleware
+from .tracing import TracingMiddleware
+
+__all__ = (
+    "MetricsMiddleware",
+    "QueryProfileMiddleware",
+    "RateLimitMiddleware",
+    "ReadYourWritesMiddleware",
+    "TracingMiddleware",
+)
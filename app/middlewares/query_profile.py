@@ -0,0 +1,46 @@
+import logging
+
+from app.core.config import settings
+from app.core.query_profiler import QueryStats, query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfileMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                timing = (
+                    f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries"'
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.reset(token)
+            if settings.DEBUG and stats.count:
+                logger.info(
+                    "%s %s: %s queries, %.1f ms in DB; slowest: %s",
+                    scope["method"],
+                    stats.route,
+                    stats.count,
+                    stats.total_time * 1000,
+                    "; ".join(
+                        f"{duration * 1000:.1f} ms {' '.join(statement.split())[:200]}"
+                        for duration, statement in stats.slowest
+                    ),
+                )
@@ -0,0 +1,76 @@
+import math
+from typing import Optional
+
+import orjson
+from jose import JWTError
+
+from app.core.metrics import rate_limited_requests
+from app.core.rate_limit import match_route_group, rate_limiter
+from app.core.security import token_verifier
+
+
+REJECT_DETAILS = {
+    "rate": "Rate limit exceeded",
+    "in_flight": "Too many requests in progress",
+}
+
+
+def _user_id(scope) -> Optional[int]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return int(token_verifier.verify(token).get("sub"))
+            except (JWTError, TypeError, ValueError):
+                return None
+    return None
+
+
+async def _reject(send, detail: str, retry_after: float) -> None:
+    body = orjson.dumps({"message": "Error: Too Many Requests", "detail": detail})
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """Per-user token buckets and in-flight caps for expensive route groups.
+
+    Runs before routing so a rejected upload is never read from the socket.
+    Requests without a valid token pass through and fail authentication later.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group = match_route_group(scope["method"], scope["path"])
+        user_id = _user_id(scope) if group else None
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await rate_limiter.admit(user_id, group)
+        if rejection is not None:
+            rate_limited_requests.inc(group=group.name, reason=rejection.reason)
+            await _reject(send, REJECT_DETAILS[rejection.reason], rejection.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await rate_limiter.release(user_id, group)
@@ -0,0 +1,57 @@
+import math
+from typing import Optional
+
+from starlette.requests import cookie_parser
+
+from app.core.config import settings
+from app.core.database import WriteMarker, write_marker
+
+COOKIE_NAME = "last_write"
+
+
+def _last_write(scope) -> Optional[float]:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            raw = cookie_parser(value.decode("latin-1")).get(COOKIE_NAME)
+            try:
+                return float(raw) if raw else None
+            except ValueError:
+                return None
+    return None
+
+
+class ReadYourWritesMiddleware:
+    """Keeps a client's reads on the primary for a while after its writes.
+
+    The time of the last write travels in a cookie, so the next request sees
+    it whichever worker or instance serves it. WebSocket connections use the
+    value sent with the handshake.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        marker = WriteMarker(_last_write(scope))
+        token = write_marker.set(marker)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and marker.written:
+                cookie = (
+                    f"{COOKIE_NAME}={marker.last_write:.3f}; "
+                    f"Max-Age={math.ceil(settings.READ_YOUR_WRITES_SECONDS)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            write_marker.reset(token)
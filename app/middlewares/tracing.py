@@ -0,0 +1,43 @@
+from app.core.tracing import SpanContext, start_span, SPAN_KIND_SERVER
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        parent = SpanContext.from_traceparent(
+            headers.get(b"traceparent", b"").decode("latin-1")
+        )
+        method = scope.get("method", "WEBSOCKET")
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with start_span(
+            f"{method} {scope['path']}",
+            SPAN_KIND_SERVER,
+            parent=parent,
+            attributes={"http.method": method, "http.target": scope["path"]},
+        ) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if span is not None:
+                    route = getattr(scope.get("route"), "path", None)
+                    if route:
+                        span.name = f"{method} {route}"
+                        span.set_attribute("http.route", route)
+                    if status_code is not None:
+                        span.set_attribute("http.status_code", status_code)
+                        if status_code >= 500:
+                            span.set_error(f"HTTP {status_code}")
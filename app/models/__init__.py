@@ -2,6 +2,7 @@ from .user import User
 from .refresh_token import RefreshToken
 from .base import Base
 from .project import Project, ProjectFile
+from .rate_limit import RateLimitBucket, RateLimitSlot
 from .enum import (
     ProjectStatusEnum,
     SessionStatusEnum,
@@ -12,7 +13,12 @@ from .enum import (
     AgentSessionStatusEnum,
     RequirementContentType,
 )
-from .session import AgentSessionMessage, AgentSessions, AgentSessionRequirement
+from .session import (
+    AgentSessionMessage,
+    AgentSessions,
+    AgentSessionRequirement,
+    AgentSessionResultChunk,
+)
 
 _all__ = (
     "Base",
@@ -32,5 +38,8 @@ _all__ = (
     "Project",
     "ProjectFile",
     "RequirementContentType",
-    "AgentSessionRequirement"
+    "AgentSessionRequirement",
+    "AgentSessionResultChunk",
+    "RateLimitBucket",
+    "RateLimitSlot",
 )
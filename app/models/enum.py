@@ -28,6 +28,7 @@ class SessionMessageRoleEnum(enum.Enum):
 class SessionCallbackEnum(enum.Enum):
     QUESTIONS = "questions"
     FINAL_RESULT = "finalResult"
+    RESULT_CHUNK = "resultChunk"
     PROJECT_UPDATED = "projectUpdated"
     ERROR = "error"
 
@@ -20,6 +20,9 @@ class Project(Base):
     status = Column(Enum(ProjectStatusEnum), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped on any change visible in the full project response (files,
+    # session, requirement); together with updated_at it forms the ETag.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     files = relationship(
         "ProjectFile",
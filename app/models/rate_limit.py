@@ -0,0 +1,26 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from app.models.base import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket of one user and route group, shared by all workers."""
+
+    __tablename__ = "rate_limit_buckets"
+    # Losing the buckets in a crash only refills them.
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class RateLimitSlot(Base):
+    """Requests of one user and route group in progress on any worker."""
+
+    __tablename__ = "rate_limit_slots"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key = Column(String, primary_key=True)
+    in_flight = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
@@ -8,11 +8,11 @@ class RefreshToken(Base):
     __tablename__ = "refresh_token"
 
     id = Column(Integer, primary_key=True)
-    token = Column(String, unique=True, nullable=False)
+    jti = Column(String(32), unique=True, nullable=False)
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="refresh_tokens", lazy="selectin")
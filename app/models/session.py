@@ -7,9 +7,12 @@ from sqlalchemy import (
     ForeignKey,
     Enum,
     Boolean,
+    Index,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.models.base import Base
 from app.models import (
@@ -22,6 +25,14 @@ from app.models import (
 
 class AgentSessions(Base):
     __tablename__ = "agent_sessions"
+    __table_args__ = (
+        # Sessions the reconciler looks at; finished ones never enter the index.
+        Index(
+            "ix_agent_sessions_processing_updated_at",
+            "updated_at",
+            postgresql_where=text("status = 'PROCESSING'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), unique=True, nullable=True)
@@ -29,6 +40,17 @@ class AgentSessions(Base):
     status = Column(Enum(SessionStatusEnum), nullable=False)
     current_iteration = Column(Integer, nullable=False, default=1)
     user_goal = Column(String, nullable=False)
+    # Dialogue as returned to clients, rewritten in the transaction of every
+    # change to the session; the version is bumped with it.
+    snapshot = deferred(Column(JSONB, nullable=True))
+    snapshot_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Also set by the snapshot rebuild, i.e. by every write to the session.
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
 
     project = relationship("Project", back_populates="session")
     messages = relationship(
@@ -47,6 +69,15 @@ class AgentSessions(Base):
 
 class AgentSessionMessage(Base):
     __tablename__ = "agent_session_messages"
+    __table_args__ = (
+        # At most one answer per question, enforced for concurrent submits.
+        Index(
+            "uq_agent_session_messages_answer_parent",
+            "parent_message_id",
+            unique=True,
+            postgresql_where=text("message_type = 'ANSWER'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("agent_sessions.id"), nullable=False)
@@ -73,17 +104,33 @@ class AgentSessionMessage(Base):
         lazy="selectin",
     )
 
+
 class AgentSessionRequirement(Base):
     __tablename__ = "agent_session_requirements"
 
     id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey("agent_sessions.id", ondelete="CASCADE"), unique=True)
+    session_id = Column(
+        Integer, ForeignKey("agent_sessions.id", ondelete="CASCADE"), unique=True
+    )
 
     content = Column(Text, nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    session = relationship(
-        "AgentSessions",
-        back_populates="requirement"
+    session = relationship("AgentSessions", back_populates="requirement")
+
+
+class AgentSessionResultChunk(Base):
+    """Part of a final result streamed by the agent before the final event."""
+
+    __tablename__ = "agent_session_result_chunks"
+
+    session_id = Column(
+        Integer, ForeignKey("agent_sessions.id", ondelete="CASCADE"), primary_key=True
     )
+    chunk_index = Column(Integer, primary_key=True)
+    content = Column(Text, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
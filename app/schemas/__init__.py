@@ -9,11 +9,14 @@ from .session import (
     CallbackProjectUpdatedData,
     SessionDTO,
     CallbackErrorData,
+    ResultChunkData,
     AgentCallback,
     ContextQuestion,
     SessionStartProjectContextRequest,
     SessionStartManualContextRequest,
     SessionAnswerRequest,
+    SessionBatchAnswer,
+    SessionAnswersBatchRequest,
     AgentSessionMessageShallow,
     AgentSessionMessageCreate,
     AgentSessionCreate,
@@ -21,7 +24,7 @@ from .session import (
     SessionStatusResponse,
     AgentSessionBase,
     UserSessionAnswerShallow,
-    AgentSessionWithRequirement
+    AgentSessionWithRequirement,
 )
 from .requirements import RequirementBase, RequirementUpdate
 
@@ -50,12 +53,15 @@ _all_ = (
     "CallbackProjectUpdatedData",
     "SessionDTO",
     "CallbackErrorData",
+    "ResultChunkData",
     "AgentCallback",
     "ContextQuestion",
     "SessionStartRequest",
     "AnswerQuestion",
     "SkipQuestion",
     "SessionAnswerRequest",
+    "SessionBatchAnswer",
+    "SessionAnswersBatchRequest",
     "AgentSessionMessageShallow",
     "AgentSessionMessageCreate",
     "AgentSessionCreate",
@@ -67,5 +73,5 @@ _all_ = (
     "UserSessionAnswerShallow",
     "RequirementBase",
     "RequirementUpdate",
-    "AgentSessionWithRequirement"
+    "AgentSessionWithRequirement",
 )
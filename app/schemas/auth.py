@@ -8,7 +8,7 @@ class Token(BaseModel):
 
 
 class RefreshTokenCreate(BaseModel):
-    token: str
+    jti: str
     user_id: int
     expires_at: datetime
 
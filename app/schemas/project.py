@@ -56,3 +56,4 @@ class ProjectShallow(BaseModel):
 class ProjectsGet(BaseModel):
     items: List[ProjectShallow]
     total: int
+    next_cursor: Optional[str] = None
@@ -52,6 +52,12 @@ class CallbackErrorData(BaseModel):
     error: Dict[str, Any]
 
 
+class ResultChunkData(BaseModel):
+    session_id: str
+    chunk_index: int = Field(..., ge=0, description="Порядковый номер части, с 0")
+    content: str
+
+
 class AgentCallback(BaseModel):
     event: SessionCallbackEnum
     timestamp: datetime
@@ -60,11 +66,13 @@ class AgentCallback(BaseModel):
         SessionDTO,
         CallbackProjectUpdatedData,
         CallbackErrorData,
+        ResultChunkData,
     ]
 
 
 # Модели для создания сессии
 
+
 class ContextQuestion(BaseModel):
     task: str
     goal: str
@@ -88,6 +96,22 @@ class SessionAnswerRequest(BaseModel):
     is_skipped: bool = False
 
 
+class SessionBatchAnswer(SessionAnswerRequest):
+    question_id: int
+
+
+class SessionAnswersBatchRequest(BaseModel):
+    answers: List[SessionBatchAnswer] = Field(..., min_length=1, max_length=100)
+
+    @field_validator("answers")
+    @classmethod
+    def unique_questions(cls, answers: List[SessionBatchAnswer]):
+        question_ids = [answer.question_id for answer in answers]
+        if len(set(question_ids)) != len(question_ids):
+            raise ValueError("Each question can be answered only once")
+        return answers
+
+
 # Модели сообщений
 
 
@@ -167,6 +191,7 @@ class AgentSessionBase(BaseModel):
     class Config:
         from_attributes = True
 
+
 class AgentSessionWithRequirement(BaseModel):
     id: int
     external_session_id: Optional[str]
@@ -178,4 +203,3 @@ class AgentSessionWithRequirement(BaseModel):
 
     class Config:
         from_attributes = True
-
@@ -2,20 +2,35 @@ from .agent_service import AgentService
 from .webhook_handler import (
     handle_questions_webhook,
     handle_final_result_webhook,
+    handle_result_chunk_webhook,
     handle_error_webhook,
     handle_project_update_webhook,
 )
-from .docs_converter import (
-    markdown_to_pdf,
-    markdown_to_word
-)
+from .token_sweeper import run_refresh_token_sweeper
+from .session_reconciler import run_session_reconciler
+from .dialogue_snapshot import load_snapshot, load_snapshot_frame
+from .connection_manager import connection_manager
+from .session_events import session_events, session_event_stream
+from .response_cache import response_cache, make_etag, etag_matches
+from .docs_converter import markdown_to_pdf, markdown_to_word
 
 __all__ = (
     "AgentService",
     "handle_questions_webhook",
     "handle_final_result_webhook",
+    "handle_result_chunk_webhook",
     "handle_error_webhook",
     "handle_project_update_webhook",
     "markdown_to_word",
-    "markdown_to_pdf"
+    "markdown_to_pdf",
+    "load_snapshot",
+    "load_snapshot_frame",
+    "session_events",
+    "connection_manager",
+    "session_event_stream",
+    "response_cache",
+    "make_etag",
+    "etag_matches",
+    "run_refresh_token_sweeper",
+    "run_session_reconciler",
 )
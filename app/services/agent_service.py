@@ -4,6 +4,30 @@ import httpx
 import uuid
 
 from app import schemas
+from app.core.config import settings
+from app.core.metrics import track_agent_call
+from app.core.tracing import trace_call, outgoing_headers, SPAN_KIND_CLIENT
+from app.services.resilience import (
+    CallPolicy,
+    Deadline,
+    DeadlineExceeded,
+    call_with_policy,
+    HEALTH,
+    IDEMPOTENT,
+    READ,
+    UPLOAD,
+    WRITE,
+)
+
+
+def agent_call(func):
+    return trace_call(f"AgentService.{func.__name__}", SPAN_KIND_CLIENT)(
+        track_agent_call(func)
+    )
+
+
+async def _inject_trace_headers(request: httpx.Request) -> None:
+    request.headers.update(outgoing_headers(request.headers.get("X-Request-ID")))
 
 
 class AgentService:
@@ -11,34 +35,81 @@ class AgentService:
         self,
         url: str,
         callback_url: str,
+        deadline: Optional[Deadline] = None,
     ):
         self.url = url
         self.callback_url = callback_url
+        self.deadline = deadline or Deadline(settings.AGENT_DEADLINE_SECONDS)
 
-    async def health_check(self):
-        http_exception = HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Agent service unavailable",
+    @staticmethod
+    def _client(timeout: httpx.Timeout) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=timeout, event_hooks={"request": [_inject_trace_headers]}
         )
+
+    async def _request(
+        self, operation: str, policy: CallPolicy, method: str, path: str, **kwargs
+    ) -> httpx.Response:
+        async def send(timeout: httpx.Timeout) -> httpx.Response:
+            async with self._client(timeout) as client:
+                return await client.request(method, f"{self.url}{path}", **kwargs)
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.url}/health")
-                if response.status_code != 200:
-                    raise http_exception
-        except httpx.HTTPError:
-            raise http_exception
+            return await call_with_policy(operation, policy, self.deadline, send)
+        except (DeadlineExceeded, httpx.TimeoutException):
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Agent service timed out",
+            )
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"{e}")
 
-    async def create_project(
-        self, title: str, description: str, files_meta: List[dict]
-    ) -> Dict:
+    @staticmethod
+    def _check_status(
+        response: httpx.Response, detail: str, expected: Optional[int] = None
+    ) -> None:
+        ok = (
+            response.is_success
+            if expected is None
+            else response.status_code == expected
+        )
+        if not ok:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"{detail}: {response.status_code} {response.text}",
+            )
+
+    @staticmethod
+    def _open_files(files_meta: List[dict]) -> list:
         multipart_files = []
         for meta in files_meta:
             try:
                 f = open(meta["path"].lstrip("/"), "rb")
             except FileNotFoundError:
+                for _, (_, opened, _) in multipart_files:
+                    opened.close()
                 raise HTTPException(500, f"File not found: {meta['path']}")
             multipart_files.append(("files", (meta["name"], f, meta["mime_type"])))
+        return multipart_files
+
+    @agent_call
+    async def health_check(self):
+        http_exception = HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Agent service unavailable",
+        )
+        try:
+            response = await self._request("health_check", HEALTH, "GET", "/health")
+        except HTTPException:
+            raise http_exception
+        if response.status_code != 200:
+            raise http_exception
 
+    @agent_call
+    async def create_project(
+        self, title: str, description: str, files_meta: List[dict]
+    ) -> Dict:
+        multipart_files = self._open_files(files_meta)
         x_request_id = str(uuid.uuid4())
         data = {
             "title": title,
@@ -47,62 +118,65 @@ class AgentService:
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.url}/projects",
-                    headers={"X-Request-ID": x_request_id},
-                    data=data,
-                    files=multipart_files,
-                )
+            response = await self._request(
+                "create_project",
+                UPLOAD,
+                "POST",
+                "/projects",
+                headers={"X-Request-ID": x_request_id},
+                data=data,
+                files=multipart_files,
+            )
         finally:
             for _, (name, f, mime) in multipart_files:
                 f.close()
 
+        self._check_status(response, "Agent failed to create project")
         return response.json()
 
+    @agent_call
     async def delete_project(self, project_id: str) -> None:
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(f"{self.url}/projects/{project_id}")
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
-            )
+        response = await self._request(
+            "delete_project", IDEMPOTENT, "DELETE", f"/projects/{project_id}"
+        )
+        # A retry whose earlier attempt deleted the project but lost the
+        # response finds nothing: the project is gone either way.
+        if response.status_code == status.HTTP_404_NOT_FOUND:
+            return
+        self._check_status(response, "Agent failed to delete project")
         data = response.json()
         if data.get("status") != "deleted":
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status_code=status.HTTP_502_BAD_GATEWAY,
                 detail=f"Agent did not delete project: {data}",
             )
 
+    @agent_call
     async def add_files_to_project(
         self, project_id: str, files_meta: List[dict]
     ) -> Dict:
-        multipart_files = []
-        for meta in files_meta:
-            try:
-                f = open(meta["path"].lstrip("/"), "rb")
-            except FileNotFoundError:
-                raise HTTPException(500, f"File not found: {meta['path']}")
-            multipart_files.append(("files", (meta["name"], f, meta["mime_type"])))
-
+        multipart_files = self._open_files(files_meta)
         x_request_id = str(uuid.uuid4())
         data = {"callback_url": self.callback_url}
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.url}/projects/{project_id}",
-                    headers={"X-Request-ID": x_request_id},
-                    data=data,
-                    files=multipart_files,
-                )
+            response = await self._request(
+                "add_files_to_project",
+                UPLOAD,
+                "POST",
+                f"/projects/{project_id}",
+                headers={"X-Request-ID": x_request_id},
+                data=data,
+                files=multipart_files,
+            )
         finally:
             for _, (name, f, mime) in multipart_files:
                 f.close()
 
+        self._check_status(response, "Agent failed to add files")
         return response.json()
 
+    @agent_call
     async def create_session_on_project(
         self,
         project_id: int,
@@ -115,19 +189,18 @@ class AgentService:
             "callback_url": self.callback_url,
         }
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.url}/interview-session",
-                    json=data,
-                    headers={"X-Request-ID": x_request_id},
-                )
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
-            )
+        response = await self._request(
+            "create_session_on_project",
+            WRITE,
+            "POST",
+            "/interview-session",
+            json=data,
+            headers={"X-Request-ID": x_request_id},
+        )
+        self._check_status(response, "Agent failed to create session")
         return response.json()
 
+    @agent_call
     async def create_interview_session_on_context(
         self,
         context_questions: schemas.ContextQuestion,
@@ -141,46 +214,37 @@ class AgentService:
                 {"task": context_questions.task},
                 {"goal": context_questions.goal},
                 {"value": context_questions.value},
-            ]
+            ],
         }
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.url}/interview-session",
-                    json=data,
-                    headers={"X-Request-ID": x_request_id},
-                )
-                if response.status_code != 202:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=f"Agent failed to create session: {response.text}",
-                    )
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
-            )
+        response = await self._request(
+            "create_interview_session_on_context",
+            WRITE,
+            "POST",
+            "/interview-session",
+            json=data,
+            headers={"X-Request-ID": x_request_id},
+        )
+        self._check_status(response, "Agent failed to create session", 202)
         return response.json()
 
-    async def get_session_status(self, session_id: str) -> Dict:
+    @agent_call
+    async def get_session_status(self, session_id: str) -> Optional[Dict]:
+        """Session as the agent sees it, ``None`` if the agent does not know it."""
         x_request_id = str(uuid.uuid4())
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.url}/interview-session/{session_id}",
-                    headers={"X-Request-ID": x_request_id},
-                )
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="Failed to get session status",
-                    )
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
-            )
+        response = await self._request(
+            "get_session_status",
+            READ,
+            "GET",
+            f"/interview-session/{session_id}",
+            headers={"X-Request-ID": x_request_id},
+        )
+        if response.status_code == status.HTTP_404_NOT_FOUND:
+            return None
+        self._check_status(response, "Failed to get session status", 200)
         return response.json()
 
+    @agent_call
     async def submit_text_answer(
         self, session_id: str, question_id: str, answer: str, is_skipped: bool
     ) -> Dict:
@@ -190,37 +254,21 @@ class AgentService:
             "callback_url": self.callback_url,
         }
         x_request_id = str(uuid.uuid4())
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.url}/interview-session/{session_id}/answer/{question_id}",
-                    json=data,
-                    headers={"X-Request-ID": x_request_id},
-                )
-                if response.status_code != 202:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="Failed to submit answer",
-                    )
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
-            )
+        response = await self._request(
+            "submit_text_answer",
+            WRITE,
+            "POST",
+            f"/interview-session/{session_id}/answer/{question_id}",
+            json=data,
+            headers={"X-Request-ID": x_request_id},
+        )
+        self._check_status(response, "Failed to submit answer", 202)
         return response.json()
 
+    @agent_call
     async def cancel_session(self, session_id: str) -> Dict:
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.url}/interview-session/{session_id}/cancel"
-                )
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="Failed to cancel session",
-                    )
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{e}"
-            )
+        response = await self._request(
+            "cancel_session", WRITE, "POST", f"/interview-session/{session_id}/cancel"
+        )
+        self._check_status(response, "Failed to cancel session", 200)
         return response.json()
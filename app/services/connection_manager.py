@@ -0,0 +1,295 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from app.core.config import settings
+from app.core.database import session as get_session_maker
+from app.core.metrics import (
+    websocket_dropped_frames,
+    websocket_evictions,
+    websocket_queued_frames,
+    websocket_rejections,
+    websocket_subscriptions,
+)
+from app.services.dialogue_snapshot import load_snapshot
+from app.services.session_events import session_events
+from app.utils.dialogue import dumps
+
+logger = logging.getLogger(__name__)
+
+PING_FRAME = dumps({"type": "ping"})
+
+
+def snapshot_message(session_id: int, frame: str) -> str:
+    # The frame is stored serialized: wrap it without re-encoding.
+    return f'{{"type":"snapshot","session_id":{session_id},"snapshot":{frame}}}'
+
+
+class Connection:
+    """One accepted WebSocket and its outbound queue.
+
+    Frames are written by a dedicated sender task, so a slow client never
+    blocks the code producing updates. Frames queued under the same key
+    replace each other until sent: a snapshot waiting in the queue is
+    superseded by a newer one instead of piling up behind it.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: Optional[int],
+        heartbeat: bool,
+        push: bool,
+        idle_timeout: float,
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.heartbeat = heartbeat
+        self.push = push
+        self.idle_timeout = idle_timeout
+        self.sessions: Set[int] = set()
+        self.last_received = time.monotonic()
+        self.closed = False
+        self._pending: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self._sequence = itertools.count()
+        self._sender: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._sender = asyncio.create_task(self._send_loop())
+
+    def touch(self) -> None:
+        self.last_received = time.monotonic()
+
+    def send(self, frame: str, key: Optional[Hashable] = None) -> None:
+        if self.closed:
+            return
+        if key is not None and key in self._pending:
+            self._pending[key] = frame
+            websocket_dropped_frames.inc(reason="coalesced")
+            return
+        if len(self._pending) >= settings.WS_SEND_QUEUE_SIZE:
+            websocket_dropped_frames.inc(reason="overflow")
+            connection_manager.evict(self, 1008, "Slow consumer", "slow_consumer")
+            return
+        self._pending[key if key is not None else next(self._sequence)] = frame
+        self._ready.set()
+
+    @property
+    def queued(self) -> int:
+        return len(self._pending)
+
+    async def _send_loop(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                while self._pending:
+                    _, frame = self._pending.popitem(last=False)
+                    await asyncio.wait_for(
+                        self.websocket.send_text(frame),
+                        settings.WS_SEND_TIMEOUT_SECONDS,
+                    )
+                self._ready.clear()
+        except TimeoutError:
+            connection_manager.evict(self, 1008, "Slow consumer", "slow_consumer")
+        except Exception:
+            # The peer is gone; the receive loop notices and unregisters.
+            self.closed = True
+
+    async def close(self, code: int = 1000, reason: Optional[str] = None) -> None:
+        self.stop()
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=code, reason=reason),
+                settings.WS_SEND_TIMEOUT_SECONDS,
+            )
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        self.closed = True
+        self._pending.clear()
+        if self._sender is not None:
+            self._sender.cancel()
+
+
+class ConnectionManager:
+    """Registry of this worker's WebSockets by user and by agent session.
+
+    Enforces the per-worker and per-user connection limits, evicts idle and
+    slow clients and sends application pings to connections that opted in.
+    Protocol-level ping/pong is left to uvicorn (``WS_HEARTBEAT_*``).
+
+    Connections with ``push`` receive a snapshot whenever a subscribed
+    session changes. Each watched session has one watcher per worker, so a
+    change is read from the database once however many sockets follow it,
+    and a notification that left the snapshot version unchanged is dropped.
+    """
+
+    def __init__(self):
+        self._connections: Set[Connection] = set()
+        self._by_user: Dict[int, Set[Connection]] = defaultdict(set)
+        self._by_session: Dict[int, Set[Connection]] = defaultdict(set)
+        self._evicting: Set[asyncio.Task] = set()
+        self._watchers: Dict[int, Tuple[asyncio.Event, asyncio.Task]] = {}
+        self._forced: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: Optional[int] = None,
+        heartbeat: bool = False,
+        push: bool = False,
+    ) -> Optional[Connection]:
+        """Accept the socket, or accept and close it with 1013 when over a limit."""
+        reason = None
+        if len(self._connections) >= settings.WS_MAX_CONNECTIONS_PER_WORKER:
+            reason = "worker_limit"
+        elif (
+            user_id is not None
+            and len(self._by_user.get(user_id, ()))
+            >= settings.WS_MAX_CONNECTIONS_PER_USER
+        ):
+            reason = "user_limit"
+
+        await websocket.accept()
+        if reason:
+            websocket_rejections.inc(reason=reason)
+            await websocket.close(code=1013, reason="Too many connections")
+            return None
+
+        idle_timeout = (
+            settings.WS_HEARTBEAT_INTERVAL_SECONDS
+            + settings.WS_HEARTBEAT_TIMEOUT_SECONDS
+            if heartbeat
+            else settings.WS_IDLE_TIMEOUT_SECONDS
+        )
+        connection = Connection(websocket, user_id, heartbeat, push, idle_timeout)
+        self._connections.add(connection)
+        if user_id is not None:
+            self._by_user[user_id].add(connection)
+        connection.start()
+        return connection
+
+    def disconnect(self, connection: Connection) -> None:
+        connection.stop()
+        self._connections.discard(connection)
+        if connection.user_id is not None:
+            _discard(self._by_user, connection.user_id, connection)
+        for session_id in list(connection.sessions):
+            self.unsubscribe(connection, session_id)
+
+    def subscribe(self, connection: Connection, session_id: int) -> None:
+        connection.sessions.add(session_id)
+        self._by_session[session_id].add(connection)
+        if connection.push and session_id not in self._watchers:
+            changed = session_events.watch(session_id)
+            task = asyncio.create_task(self._watch(session_id, changed))
+            self._watchers[session_id] = (changed, task)
+
+    def unsubscribe(self, connection: Connection, session_id: int) -> None:
+        connection.sessions.discard(session_id)
+        _discard(self._by_session, session_id, connection)
+        watcher = self._watchers.get(session_id)
+        if watcher is not None and not any(
+            c.push for c in self.subscribers(session_id)
+        ):
+            changed, task = self._watchers.pop(session_id)
+            self._forced.discard(session_id)
+            session_events.unwatch(session_id, changed)
+            task.cancel()
+
+    def refresh(self, session_id: int) -> None:
+        """Push a fresh snapshot of ``session_id`` to its subscribers."""
+        watcher = self._watchers.get(session_id)
+        if watcher is not None:
+            self._forced.add(session_id)
+            watcher[0].set()
+
+    async def _watch(self, session_id: int, changed: asyncio.Event) -> None:
+        version = None
+        while True:
+            await changed.wait()
+            changed.clear()
+            forced = session_id in self._forced
+            self._forced.discard(session_id)
+            try:
+                # The primary is read: a replica may not have the change yet.
+                async with get_session_maker() as db_session:
+                    snapshot = await load_snapshot(db_session, session_id)
+            except Exception:
+                logger.exception("Failed to load snapshot of session %s", session_id)
+                continue
+            if snapshot is None or (snapshot.version == version and not forced):
+                continue
+            version = snapshot.version
+            message = snapshot_message(session_id, snapshot.frame)
+            for connection in list(self.subscribers(session_id)):
+                if connection.push:
+                    connection.send(message, key=("snapshot", session_id))
+
+    def subscribers(self, session_id: int) -> Set[Connection]:
+        return self._by_session.get(session_id, set())
+
+    def subscription_count(self) -> int:
+        return sum(len(connections) for connections in self._by_session.values())
+
+    def queued_frames(self) -> int:
+        return sum(connection.queued for connection in self._connections)
+
+    def evict(
+        self, connection: Connection, code: int, reason: str, metric: str
+    ) -> None:
+        """Close a connection in the background; the endpoint then unregisters it."""
+        if connection.closed:
+            return
+        websocket_evictions.inc(reason=metric)
+        connection.stop()
+        task = asyncio.create_task(connection.close(code, reason))
+        self._evicting.add(task)
+        task.add_done_callback(self._evicting.discard)
+
+    def check_heartbeats(self) -> None:
+        now = time.monotonic()
+        for connection in list(self._connections):
+            quiet = now - connection.last_received
+            if quiet >= connection.idle_timeout:
+                if connection.heartbeat:
+                    self.evict(connection, 1001, "Heartbeat timeout", "heartbeat")
+                else:
+                    self.evict(connection, 1001, "Idle timeout", "idle")
+            elif (
+                connection.heartbeat and quiet >= settings.WS_HEARTBEAT_INTERVAL_SECONDS
+            ):
+                connection.send(PING_FRAME, key="ping")
+
+    async def run_heartbeats(self) -> None:
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL_SECONDS / 2)
+            try:
+                self.check_heartbeats()
+            except Exception:
+                logger.exception("WebSocket heartbeat check failed")
+
+
+def _discard(
+    index: Dict[int, Set[Connection]], key: int, connection: Connection
+) -> None:
+    connections = index.get(key)
+    if connections is not None:
+        connections.discard(connection)
+        if not connections:
+            del index[key]
+
+
+connection_manager = ConnectionManager()
+websocket_subscriptions.set_function(connection_manager.subscription_count)
+websocket_queued_frames.set_function(connection_manager.queued_frames)
@@ -0,0 +1,66 @@
+from typing import NamedTuple, Optional
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cruds import (
+    AgentSessionsCRUD,
+    AgentSessionRequirementCRUD,
+    AgentSessionResultChunkCRUD,
+)
+from app.utils.dialogue import build_dialogue_snapshot, dumps
+
+
+class StoredSnapshot(NamedTuple):
+    version: int
+    frame: str
+    owner_id: Optional[int]
+
+
+async def load_snapshot(
+    db_session: AsyncSession, session_id: int
+) -> Optional[StoredSnapshot]:
+    """Serialized snapshot of a session, or ``None`` if it does not exist.
+
+    The snapshot is kept up to date by every write, so this is one primary key
+    lookup, plus the buffered chunks while a result is streamed; ``version``
+    changes whenever the snapshot does.
+    """
+    row = await AgentSessionsCRUD.get_snapshot(db_session, session_id)
+    if row is None:
+        return None
+    # Chunks only bump the version; their text is added here while they last.
+    partial_result = (
+        await AgentSessionResultChunkCRUD.get_partial_result(db_session, session_id)
+        if row.has_result_chunks
+        else None
+    )
+    if row.snapshot is not None:
+        if partial_result is None:
+            return StoredSnapshot(row.snapshot_version, row.snapshot, row.user_id)
+        snapshot = orjson.loads(row.snapshot)
+        if snapshot["result"] is None:
+            snapshot["partial_result"] = partial_result
+        return StoredSnapshot(row.snapshot_version, dumps(snapshot), row.user_id)
+
+    # Not written since snapshots were introduced: build it from the messages.
+    agent_session = await AgentSessionsCRUD.get_by_id(db_session, session_id)
+    requirement = await AgentSessionRequirementCRUD.get_by_session_id(
+        db_session, session_id
+    )
+    snapshot = build_dialogue_snapshot(
+        agent_session.id,
+        agent_session.status,
+        agent_session.current_iteration,
+        agent_session.messages,
+        requirement.id if requirement else None,
+        partial_result,
+    )
+    return StoredSnapshot(row.snapshot_version, dumps(snapshot), row.user_id)
+
+
+async def load_snapshot_frame(
+    db_session: AsyncSession, session_id: int
+) -> Optional[str]:
+    snapshot = await load_snapshot(db_session, session_id)
+    return snapshot.frame if snapshot else None
@@ -1,9 +1,12 @@
-from docx import Document
-from weasyprint import HTML
 from io import BytesIO
-import markdown
+
+# WeasyPrint (cairo/pango), python-docx and markdown are imported on first
+# export so API workers that never export do not pay for them at startup.
+
 
 def markdown_to_word(md_content: str) -> BytesIO:
+    from docx import Document
+
     doc = Document()
     for line in md_content.split("\n"):
         doc.add_paragraph(line)
@@ -13,8 +16,10 @@ def markdown_to_word(md_content: str) -> BytesIO:
     return file_stream
 
 
-
 def markdown_to_pdf(md_content: str) -> BytesIO:
+    import markdown
+    from weasyprint import HTML
+
     html_content = markdown.markdown(md_content)
     pdf_stream = BytesIO()
     HTML(string=html_content).write_pdf(pdf_stream)
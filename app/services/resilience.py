@@ -0,0 +1,150 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import agent_call_retries
+
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    connect_timeout: float
+    read_timeout: float
+    retries: int = 0
+    backoff_base: float = 0.1
+    backoff_max: float = 2.0
+    # Start a second identical request if the first has not answered by then.
+    hedge_after: Optional[float] = None
+
+    def timeout(self, remaining: float) -> httpx.Timeout:
+        return httpx.Timeout(
+            min(self.read_timeout, remaining),
+            connect=min(self.connect_timeout, remaining),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter keeps retries from many workers from arriving in lockstep.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+WRITE = CallPolicy(
+    connect_timeout=settings.AGENT_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.AGENT_READ_TIMEOUT_SECONDS,
+)
+UPLOAD = CallPolicy(
+    connect_timeout=settings.AGENT_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.AGENT_UPLOAD_TIMEOUT_SECONDS,
+)
+IDEMPOTENT = CallPolicy(
+    connect_timeout=settings.AGENT_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.AGENT_READ_TIMEOUT_SECONDS,
+    retries=settings.AGENT_RETRIES,
+)
+# A probe: one short attempt, so a slow agent is reported rather than waited on.
+HEALTH = CallPolicy(
+    connect_timeout=min(
+        settings.AGENT_CONNECT_TIMEOUT_SECONDS, settings.AGENT_HEALTH_TIMEOUT_SECONDS
+    ),
+    read_timeout=settings.AGENT_HEALTH_TIMEOUT_SECONDS,
+)
+READ = CallPolicy(
+    connect_timeout=settings.AGENT_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.AGENT_READ_TIMEOUT_SECONDS,
+    retries=settings.AGENT_RETRIES,
+    hedge_after=settings.AGENT_HEDGE_AFTER_SECONDS,
+)
+
+
+class Deadline:
+    """Time budget shared by every agent call made for one incoming request."""
+
+    def __init__(self, budget: float):
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+async def _hedged(
+    attempt: Callable[[], Awaitable[httpx.Response]], hedge_after: float
+) -> httpx.Response:
+    first = asyncio.ensure_future(attempt())
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return first.result()
+
+        tasks.append(asyncio.ensure_future(attempt()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        # Both failed: surface the error of the original request.
+        return first.result()
+    finally:
+        # Also reached when the caller is cancelled: no attempt outlives it.
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+
+
+async def call_with_policy(
+    operation: str,
+    policy: CallPolicy,
+    deadline: Deadline,
+    send: Callable[[httpx.Timeout], Awaitable[httpx.Response]],
+) -> httpx.Response:
+    """Run ``send`` under the policy's timeouts, retries and hedging.
+
+    Retries happen on transport errors and on 429/5xx gateway statuses, never
+    past the deadline. The last response or error is returned to the caller.
+    """
+    attempt = 0
+    while True:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(operation)
+
+        async def single_attempt() -> httpx.Response:
+            return await send(policy.timeout(remaining))
+
+        try:
+            async with asyncio.timeout(remaining):
+                if policy.hedge_after is not None and policy.hedge_after < remaining:
+                    response = await _hedged(single_attempt, policy.hedge_after)
+                else:
+                    response = await single_attempt()
+        except TimeoutError:
+            raise DeadlineExceeded(operation)
+        except httpx.TransportError as e:
+            delay = policy.backoff(attempt)
+            if attempt >= policy.retries or delay >= deadline.remaining():
+                raise
+            reason = type(e).__name__
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                return response
+            delay = policy.backoff(attempt)
+            if attempt >= policy.retries or delay >= deadline.remaining():
+                return response
+            reason = str(response.status_code)
+
+        agent_call_retries.inc(method=operation, reason=reason)
+        await asyncio.sleep(delay)
+        attempt += 1
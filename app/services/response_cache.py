@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Hashable, Optional
+
+from app.core.config import settings
+
+
+def make_etag(kind: str, _id: int, version: int, updated_at: Optional[datetime]) -> str:
+    stamp = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+    return f'"{kind}-{_id}-{version}-{stamp:x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function.
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class ResponseCache:
+    """Serialized GET responses keyed by resource, valid for a single ETag.
+
+    Writes bump the resource version in the database, so a stale entry is
+    never served: its ETag no longer matches and it is replaced on next read.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, etag: str) -> Optional[bytes]:
+        cached = self._entries.get(key)
+        if cached is None or cached[0] != etag:
+            return None
+        self._entries.move_to_end(key)
+        return cached[1]
+
+    def put(self, key: Hashable, etag: str, body: bytes) -> bytes:
+        if self.max_size <= 0:
+            return body
+        self._entries[key] = (etag, body)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return body
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_SIZE)
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import session as get_session_maker
+from app.core.metrics import sse_streams
+from app.cruds import (
+    AgentSessionsCRUD,
+    AgentSessionMessageCRUD,
+    AgentSessionRequirementCRUD,
+    AgentSessionResultChunkCRUD,
+)
+from app.models import SessionMessageTypeEnum, SessionStatusEnum
+from app.utils.dialogue import answer_payload, dumps, question_payload, result_payload
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "agent_session_events"
+# How often an idle LISTEN connection is checked for a silent disconnect.
+LISTENER_PING_SECONDS = 30
+EVENT_PAGE_SIZE = 500
+TERMINAL_STATUSES = frozenset(
+    {SessionStatusEnum.DONE, SessionStatusEnum.ERROR, SessionStatusEnum.CANCELLED}
+)
+
+
+class SessionEventBus:
+    """Wakes up streams watching an agent session after it changes.
+
+    A subscriber is a bare ``asyncio.Event``: an idle stream is one parked
+    coroutine and holds no database connection. With the ``postgres``
+    backend a change is published with NOTIFY and the listener of every
+    worker dispatches it locally; ``memory`` stays inside the process.
+    """
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self._subscribers: Dict[int, Set[asyncio.Event]] = defaultdict(set)
+
+    def watch(self, session_id: int) -> asyncio.Event:
+        event = asyncio.Event()
+        self._subscribers[session_id].add(event)
+        return event
+
+    def unwatch(self, session_id: int, event: asyncio.Event) -> None:
+        subscribers = self._subscribers.get(session_id)
+        if subscribers is not None:
+            subscribers.discard(event)
+            if not subscribers:
+                del self._subscribers[session_id]
+
+    @contextmanager
+    def subscribe(self, session_id: int):
+        event = self.watch(session_id)
+        try:
+            yield event
+        finally:
+            self.unwatch(session_id, event)
+
+    def dispatch(self, session_id: int) -> None:
+        for event in self._subscribers.get(session_id, ()):
+            event.set()
+
+    def dispatch_all(self) -> None:
+        for session_id in list(self._subscribers):
+            self.dispatch(session_id)
+
+    async def publish(self, db_session: AsyncSession, session_id: int) -> None:
+        """Announce a committed change of ``session_id`` to every worker."""
+        if self.backend != "postgres":
+            self.dispatch(session_id)
+            return
+        try:
+            await db_session.execute(select(func.pg_notify(CHANNEL, str(session_id))))
+            await db_session.commit()
+        except Exception:
+            # The change itself is committed; streams catch up on the next event.
+            logger.exception("Failed to publish change of session %s", session_id)
+            await db_session.rollback()
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        try:
+            self.dispatch(int(payload))
+        except ValueError:
+            logger.warning("Ignoring malformed %s notification %r", channel, payload)
+
+    async def listen(self) -> None:
+        """Hold a dedicated LISTEN connection for the lifetime of the worker."""
+        if self.backend != "postgres":
+            return
+        url = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        dsn = url.render_as_string(hide_password=False)
+        while True:
+            connection: Optional[asyncpg.Connection] = None
+            try:
+                connection = await asyncpg.connect(
+                    dsn,
+                    server_settings={"application_name": settings.DB_APPLICATION_NAME},
+                )
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(CHANNEL, self._on_notification)
+                # Anything published while we were not listening is lost:
+                # let every stream re-read its session.
+                self.dispatch_all()
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), LISTENER_PING_SECONDS)
+                    except TimeoutError:
+                        await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Session event listener failed, reconnecting")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await asyncio.shield(connection.close())
+            await asyncio.sleep(settings.SESSION_EVENTS_RECONNECT_SECONDS)
+
+
+session_events = SessionEventBus(settings.SESSION_EVENTS_BACKEND)
+# A change to a watched session wakes all of its streams at once; they
+# queue here rather than drain the connection pool for regular requests.
+_stream_reads = asyncio.Semaphore(settings.SSE_MAX_CONCURRENT_READS)
+
+
+def format_event(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {dumps(data)}\n\n"
+
+
+async def session_event_stream(
+    session_id: int, last_event_id: int = 0
+) -> AsyncIterator[str]:
+    """Server-sent events for one agent session.
+
+    Every stored message is an event whose id is the message id, so a client
+    reconnecting with ``Last-Event-ID`` only receives what it missed. Status
+    changes come as ``status`` events without an id; ``end`` is sent once the
+    session is finished and the stream closes.
+
+    While the agent streams the result, its parts come in order as
+    ``result_chunk`` events without an id: after a reconnect they are sent
+    again from the first one.
+    """
+    sse_streams.inc()
+    last_state = None
+    next_chunk = 0
+    try:
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+        with session_events.subscribe(session_id) as changed:
+            while True:
+                # Cleared before reading so a change committed meanwhile is not lost.
+                changed.clear()
+                events = []
+                # The primary is read: a replica may not have the change yet.
+                async with _stream_reads, get_session_maker() as db_session:
+                    state = await AgentSessionsCRUD.get_state(db_session, session_id)
+                    messages = await AgentSessionMessageCRUD.get_after(
+                        db_session, session_id, last_event_id, EVENT_PAGE_SIZE
+                    )
+                    for message in messages:
+                        if message.message_type == SessionMessageTypeEnum.QUESTION:
+                            data = question_payload(message)
+                        elif message.message_type == SessionMessageTypeEnum.ANSWER:
+                            data = {
+                                **answer_payload(message),
+                                "question_id": message.parent_message_id,
+                            }
+                        else:
+                            requirement = (
+                                await AgentSessionRequirementCRUD.get_by_session_id(
+                                    db_session, session_id
+                                )
+                            )
+                            data = result_payload(
+                                message, requirement.id if requirement else None
+                            )
+                        events.append(
+                            format_event(message.message_type.value, data, message.id)
+                        )
+                        last_event_id = message.id
+                    if state is not None and state.status not in TERMINAL_STATUSES:
+                        chunks = await AgentSessionResultChunkCRUD.get_from(
+                            db_session, session_id, next_chunk
+                        )
+                        for chunk_index, content in chunks:
+                            events.append(
+                                format_event(
+                                    "result_chunk",
+                                    {
+                                        "session_id": session_id,
+                                        "chunk_index": chunk_index,
+                                        "content": content,
+                                    },
+                                )
+                            )
+                        next_chunk += len(chunks)
+
+                if state is None:
+                    yield format_event("error", {"message": "Session not found"})
+                    return
+                for event in events:
+                    yield event
+                if tuple(state) != last_state:
+                    last_state = tuple(state)
+                    yield format_event(
+                        "status",
+                        {
+                            "session_id": session_id,
+                            "session_status": state.status,
+                            "current_iteration": state.current_iteration,
+                        },
+                    )
+                if state.status in TERMINAL_STATUSES:
+                    yield format_event("end", {"session_id": session_id})
+                    return
+                if len(messages) == EVENT_PAGE_SIZE:
+                    # More than one page was missed: keep reading.
+                    continue
+
+                while not changed.is_set():
+                    try:
+                        await asyncio.wait_for(
+                            changed.wait(), settings.SSE_KEEPALIVE_SECONDS
+                        )
+                    except TimeoutError:
+                        # Keeps proxies from closing an idle stream.
+                        yield ": keepalive\n\n"
+    finally:
+        sse_streams.dec()
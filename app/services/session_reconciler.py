@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+
+from app import schemas
+from app.core.config import settings
+from app.core.database import advisory_lock, session as get_session_maker
+from app.core.metrics import session_reconciliations
+from app.cruds import AgentSessionsCRUD
+from app.exceptions.custom import IncompleteResultException
+from app.models import AgentSessionStatusEnum, SessionStatusEnum
+from app.services.agent_service import AgentService
+from app.services.session_events import session_events
+from app.services.webhook_handler import apply_final_result, apply_session_error
+
+logger = logging.getLogger(__name__)
+
+# Every worker runs the reconciler; one pass at a time asks the agent.
+RECONCILE_LOCK_KEY = 7_310_002
+
+
+def _agent() -> AgentService:
+    # A fresh deadline per check, as for a request.
+    return AgentService(
+        url=settings.EXTERNAL_API_URL, callback_url=settings.CALLBACK_URL
+    )
+
+
+async def reconcile_session(session_id: int, external_session_id: str) -> str:
+    """Bring one stuck session in line with the agent; returns the outcome."""
+    agent = _agent()
+    try:
+        data = await agent.get_session_status(external_session_id)
+    except HTTPException as e:
+        logger.warning(
+            "Could not check session %s with the agent: %s", session_id, e.detail
+        )
+        return "agent_error"
+
+    async with get_session_maker() as db_session:
+        agent_session = await AgentSessionsCRUD.get_for_update(db_session, session_id)
+        # A webhook may have arrived while the agent was being asked.
+        if (
+            agent_session is None
+            or agent_session.status != SessionStatusEnum.PROCESSING
+        ):
+            return "resolved"
+
+        if data is None:
+            await apply_session_error(db_session, agent_session)
+            return "lost"
+        dto = schemas.SessionDTO.model_validate(data)
+        if dto.error or dto.session_status == AgentSessionStatusEnum.ERROR:
+            await apply_session_error(db_session, agent_session)
+            return "error"
+        if dto.session_status == AgentSessionStatusEnum.DONE:
+            try:
+                await apply_final_result(db_session, dto)
+            except IncompleteResultException:
+                # A chunk is still on its way; the next pass tries again.
+                await db_session.rollback()
+                return "pending"
+            return "done"
+        if dto.session_status == AgentSessionStatusEnum.CANCELLED:
+            await AgentSessionsCRUD.update(
+                db_session, agent_session, {"status": SessionStatusEnum.CANCELLED}
+            )
+            await session_events.publish(db_session, session_id)
+            return "cancelled"
+        # Still running, or waiting on questions whose webhook was lost: the
+        # status response does not carry them, so there is nothing to apply.
+        return "pending"
+
+
+async def reconcile_stuck_sessions(
+    stuck_for: timedelta, batch_size: int, concurrency: int
+) -> int:
+    before = datetime.now(timezone.utc) - stuck_for
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def reconcile(row) -> None:
+        async with semaphore:
+            try:
+                outcome = await reconcile_session(row.id, row.external_session_id)
+            except Exception:
+                logger.exception("Failed to reconcile session %s", row.id)
+                outcome = "failed"
+        session_reconciliations.inc(outcome=outcome)
+        if outcome not in ("pending", "agent_error", "failed"):
+            logger.info("Reconciled stuck session %s: %s", row.id, outcome)
+
+    checked = 0
+    after_id = 0
+    while True:
+        async with get_session_maker() as db_session:
+            rows = await AgentSessionsCRUD.get_stuck(
+                db_session, before, after_id, batch_size
+            )
+        await asyncio.gather(*(reconcile(row) for row in rows))
+        checked += len(rows)
+        if len(rows) < batch_size:
+            return checked
+        after_id = rows[-1].id
+
+
+async def run_session_reconciler():
+    if settings.SESSION_RECONCILE_INTERVAL_SECONDS <= 0:
+        return
+    while True:
+        await asyncio.sleep(settings.SESSION_RECONCILE_INTERVAL_SECONDS)
+        try:
+            async with advisory_lock(RECONCILE_LOCK_KEY) as acquired:
+                if acquired:
+                    await reconcile_stuck_sessions(
+                        timedelta(seconds=settings.SESSION_RECONCILE_STUCK_SECONDS),
+                        settings.SESSION_RECONCILE_BATCH_SIZE,
+                        settings.SESSION_RECONCILE_CONCURRENCY,
+                    )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Session reconciliation failed")
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.database import advisory_lock, session as get_session_maker
+from app.cruds import RefreshTokenCRUD
+
+logger = logging.getLogger(__name__)
+
+# Every worker runs the sweeper; the lock lets one of them sweep at a time.
+SWEEP_LOCK_KEY = 7_310_001
+
+
+async def sweep_expired_refresh_tokens(batch_size: int) -> int:
+    removed = 0
+    while True:
+        async with get_session_maker() as db_session:
+            deleted = await RefreshTokenCRUD.remove_expired_batch(
+                db_session, batch_size
+            )
+        removed += deleted
+        if deleted < batch_size:
+            return removed
+        # Yield between chunks so the sweep never holds the loop or locks for long
+        await asyncio.sleep(0)
+
+
+async def run_refresh_token_sweeper():
+    while True:
+        try:
+            async with advisory_lock(SWEEP_LOCK_KEY) as acquired:
+                if acquired:
+                    removed = await sweep_expired_refresh_tokens(
+                        settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE
+                    )
+                    if removed:
+                        logger.info("Removed %s expired refresh tokens", removed)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Refresh token sweep failed")
+        await asyncio.sleep(settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS)
@@ -2,7 +2,14 @@ from fastapi import Request, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Union
 
-from app.cruds import AgentSessionsCRUD, AgentSessionMessageCRUD, ProjectCRUD, AgentSessionRequirementCRUD
+from app.cruds import (
+    AgentSessionsCRUD,
+    AgentSessionMessageCRUD,
+    ProjectCRUD,
+    AgentSessionRequirementCRUD,
+    AgentSessionResultChunkCRUD,
+)
+from app.exceptions.custom import NotFoundException
 from app.models import (
     SessionStatusEnum,
     SessionMessageRoleEnum,
@@ -14,6 +21,8 @@ from app.models import (
     ProjectStatusEnum,
 )
 from app import schemas
+from app.services.response_cache import response_cache
+from app.services.session_events import session_events
 
 
 def normalize_question_status(status_value) -> Union[QuestionStatusEnum, None]:
@@ -50,68 +59,47 @@ async def handle_questions_webhook(
             detail="X-Request-ID header is required",
         )
 
-    project = await ProjectCRUD.get_last(session)
-    if project.status != ProjectStatusEnum.FINISHED:
-        project_id = project.id
-        agent_session = await AgentSessionsCRUD.get_by_project_id(session, project_id)
-        agent_session_id = agent_session.id
-
-        update_data = {"current_iteration": data.iteration_number}
-        if agent_session.external_session_id is None:
-            update_data["external_session_id"] = data.session_id
-
-        await AgentSessionsCRUD.update(
-            session,
-            agent_session,
-            update_data,
-        )
+    # Sessions know their external id from the start response; only a
+    # webhook that beats the start commit falls back to the latest project.
+    agent_session = await AgentSessionsCRUD.get_by_external_id(session, data.session_id)
+    update_data = {"status": SessionStatusEnum.WAITING_FOR_ANSWERS}
+    if agent_session is not None:
+        update_data["current_iteration"] = data.iteration_number
     else:
-        agent_session = await AgentSessionsCRUD.get_last(session)
-        agent_session_id = agent_session.id
-        if agent_session.external_session_id is None:
-            await AgentSessionsCRUD.update(
-                session,
-                agent_session,
-                {
-                    "external_session_id": data.session_id,
-                }
-            )
-
-    for question in data.questions:
-        existing = await AgentSessionMessageCRUD.get_by_external_question_id(
-            session, question.id
-        )
-
-        normalized_status = normalize_question_status(question.status)
-
-        if existing:
-            await AgentSessionMessageCRUD.update(
-                session,
-                existing,
-                {
-                    "question_status": normalized_status,
-                },
+        project = await ProjectCRUD.get_last(session)
+        if project.status != ProjectStatusEnum.FINISHED:
+            agent_session = await AgentSessionsCRUD.get_by_project_id(
+                session, project.id
             )
+            update_data["current_iteration"] = data.iteration_number
         else:
-            await AgentSessionMessageCRUD.create(
-                session,
-                {
-                    "session_id": agent_session_id,
-                    "role": SessionMessageRoleEnum.AGENT,
-                    "content": question.question,
-                    "message_type": SessionMessageTypeEnum.QUESTION,
-                    "question_external_id": question.id,
-                    "question_number": question.question_number,
-                    "question_status": normalized_status,
-                    "explanation": question.explanation,
-                },
+            agent_session = await AgentSessionsCRUD.get_last(session)
+        if agent_session is None:
+            raise NotFoundException(
+                "agent_sessions", "external_session_id", data.session_id
             )
+        if agent_session.external_session_id is None:
+            update_data["external_session_id"] = data.session_id
+    agent_session_id = agent_session.id
 
-    await AgentSessionsCRUD.update(
+    # One transaction for the whole iteration: the snapshot is rebuilt once
+    # and clients never see the questions before the status.
+    await AgentSessionsCRUD.apply_questions(
         session,
         agent_session,
-        {"status": SessionStatusEnum.WAITING_FOR_ANSWERS},
+        update_data,
+        [
+            {
+                "content": question.question,
+                "question_external_id": question.id,
+                "question_number": question.question_number,
+                "question_status": normalize_question_status(question.status),
+                "explanation": question.explanation,
+            }
+            for question in data.questions
+        ],
     )
+    await session_events.publish(session, agent_session_id)
 
     return {"status": "ok"}
 
@@ -126,22 +114,43 @@ async def handle_final_result_webhook(
             detail="X-Request-ID header is required",
         )
 
+    await apply_final_result(session, data)
+    return {"status": "ok"}
+
+
+async def apply_final_result(session: AsyncSession, data: schemas.SessionDTO) -> None:
+    """Store the agent's final state of a session, from a webhook or a status poll."""
     agent_session = await AgentSessionsCRUD.get_by_external_id(session, data.session_id)
+    agent_session_id = agent_session.id
     agent_session_upd = {
         "status": data.session_status.value,
         "current_iteration": data.iteration_number,
     }
+    # A result streamed in chunks may come without final_result: assemble it,
+    # or answer 409 while a chunk is missing so the event is retried. The
+    # buffer is cleared in the same commit as the status change, under the
+    # row lock a chunk takes too, so no chunk lands after it.
+    await AgentSessionsCRUD.lock(session, agent_session_id)
+    if data.final_result:
+        await AgentSessionResultChunkCRUD.clear(session, agent_session_id)
+        final_result = data.final_result
+    else:
+        final_result = await AgentSessionResultChunkCRUD.pop_result(
+            session, agent_session_id
+        )
     await AgentSessionsCRUD.update(session, agent_session, agent_session_upd)
 
-    if data.final_result:
+    if final_result:
         message_upd = {
             "session_id": agent_session.id,
             "role": SessionMessageRoleEnum.AGENT,
-            "content": data.final_result,
+            "content": final_result,
             "message_type": SessionMessageTypeEnum.RESULT,
         }
         await AgentSessionMessageCRUD.create(session, message_upd)
-        existing_req = await AgentSessionRequirementCRUD.get_by_session_id(session, agent_session.id)
+        existing_req = await AgentSessionRequirementCRUD.get_by_session_id(
+            session, agent_session.id
+        )
         if existing_req:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -149,14 +158,54 @@ async def handle_final_result_webhook(
             )
         requirements = {
             "session_id": agent_session.id,
-            "content": data.final_result,
+            "content": final_result,
         }
         await AgentSessionRequirementCRUD.create(session, requirements)
 
-    project = await ProjectCRUD.get_by_external_id(session, data.project_id)
+    # Sessions started from manual context have no project on the agent either.
+    project = (
+        await ProjectCRUD.get_by_external_id(session, data.project_id)
+        if data.project_id
+        else None
+    )
     if project:
         project_upd = {"status": ProjectStatusEnum.FINISHED}
         await ProjectCRUD.update(session, project, project_upd)
+        response_cache.invalidate(("project", project.id))
+    await session_events.publish(session, agent_session_id)
+
+
+async def handle_result_chunk_webhook(
+    request: Request, data: schemas.ResultChunkData, session: AsyncSession
+):
+    request_id = request.headers.get("X-Request-ID")
+    if not request_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="X-Request-ID header is required",
+        )
+
+    agent_session = await AgentSessionsCRUD.get_by_external_id(session, data.session_id)
+    if agent_session is None:
+        raise NotFoundException(
+            "agent_sessions", "external_session_id", data.session_id
+        )
+    agent_session_id = agent_session.id
+    await AgentSessionsCRUD.lock(session, agent_session_id)
+    state = await AgentSessionsCRUD.get_state(session, agent_session_id)
+    # A chunk retried after the final event must not start a new buffer.
+    if state.status in (
+        SessionStatusEnum.DONE,
+        SessionStatusEnum.ERROR,
+        SessionStatusEnum.CANCELLED,
+    ):
+        await session.rollback()
+        return {"status": "ok"}
+
+    if await AgentSessionResultChunkCRUD.append(
+        session, agent_session_id, data.chunk_index, data.content
+    ):
+        await session_events.publish(session, agent_session_id)
     return {"status": "ok"}
 
 
@@ -176,14 +225,22 @@ async def handle_error_webhook(
     if session_id:
         agent_session = await AgentSessionsCRUD.get_by_external_id(session, session_id)
         if agent_session:
-            await AgentSessionsCRUD.update(
-                session,
-                agent_session,
-                {
-                    "status": SessionStatusEnum.ERROR,
-                    "agent_session_status": AgentSessionStatusEnum.ERROR,
-                },
-            )
+            await apply_session_error(session, agent_session)
+
+
+async def apply_session_error(
+    session: AsyncSession, agent_session: AgentSessions
+) -> None:
+    agent_session_id = agent_session.id
+    await AgentSessionsCRUD.update(
+        session,
+        agent_session,
+        {
+            "status": SessionStatusEnum.ERROR,
+            "agent_session_status": AgentSessionStatusEnum.ERROR,
+        },
+    )
+    await session_events.publish(session, agent_session_id)
 
 
 async def handle_project_update_webhook(
@@ -205,5 +262,6 @@ async def handle_project_update_webhook(
         "external_id": data.id,
     }
     await ProjectCRUD.update(session, project, upd_project)
+    response_cache.invalidate(("project", project.id))
 
     return {"status": "ok"}
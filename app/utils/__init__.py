@@ -1,3 +1,10 @@
 from .files import save_file_with_meta
+from .cursor import encode_cursor, decode_cursor
+from .dialogue import build_dialogue_snapshot
 
-__all__ = "save_file_with_meta"
+__all__ = (
+    "save_file_with_meta",
+    "encode_cursor",
+    "decode_cursor",
+    "build_dialogue_snapshot",
+)
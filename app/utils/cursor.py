@@ -0,0 +1,32 @@
+import base64
+import hashlib
+import json
+from typing import Optional, Tuple
+
+
+def _search_digest(search: Optional[str]) -> str:
+    return hashlib.sha256((search or "").encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(priority: int, _id: int, search: Optional[str] = None) -> str:
+    payload = [_search_digest(search), priority, _id]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, search: Optional[str] = None) -> Tuple[int, int]:
+    """Decode a cursor issued for the same search term.
+
+    A cursor from another search would resume in a different ordering, so
+    it is rejected like a malformed one.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        digest, priority, _id = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii"))
+        )
+        if digest != _search_digest(search):
+            raise ValueError("cursor was issued for another search")
+        return int(priority), int(_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
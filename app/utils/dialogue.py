@@ -0,0 +1,87 @@
+from typing import Iterable, Optional
+
+import orjson
+
+from app.models import AgentSessionMessage, SessionMessageTypeEnum, SessionStatusEnum
+
+
+def dumps(payload: dict) -> str:
+    return orjson.dumps(payload).decode("utf-8")
+
+
+def question_payload(question: AgentSessionMessage) -> dict:
+    return {
+        "id": question.id,
+        "content": question.content,
+        "question_number": question.question_number,
+        "explanation": question.explanation,
+        "created_at": question.created_at,
+    }
+
+
+def answer_payload(answer: AgentSessionMessage) -> dict:
+    payload = {
+        "id": answer.id,
+        "content": answer.content,
+        "created_at": answer.created_at,
+    }
+    if answer.is_skipped:
+        payload["is_skipped"] = True
+    return payload
+
+
+def result_payload(result: AgentSessionMessage, requirement_id: Optional[int]) -> dict:
+    return {
+        "requirement_id": requirement_id,
+        "content": result.content,
+        "created_at": result.created_at,
+    }
+
+
+def build_dialogue_snapshot(
+    session_id: int,
+    status: SessionStatusEnum,
+    current_iteration: int,
+    messages: Iterable[AgentSessionMessage],
+    requirement_id: Optional[int],
+    partial_result: Optional[str] = None,
+) -> dict:
+    """Dialogue as shown to the user: answered questions and the next one to answer.
+
+    ``partial_result`` is the part of the result streamed so far, shown until
+    the result itself is stored.
+    """
+    messages = list(messages)
+    questions = sorted(
+        [m for m in messages if m.message_type == SessionMessageTypeEnum.QUESTION],
+        key=lambda x: (x.created_at, x.id),
+    )
+    answers = {}
+    for m in messages:
+        if m.message_type == SessionMessageTypeEnum.ANSWER:
+            answers.setdefault(m.parent_message_id, m)
+    result_message = next(
+        (m for m in messages if m.message_type == SessionMessageTypeEnum.RESULT),
+        None,
+    )
+
+    dialogue = []
+    for q in questions:
+        question_dict = question_payload(q)
+        answer = answers.get(q.id)
+        if not answer:
+            dialogue.append({"question": question_dict, "answer": None})
+            break
+        dialogue.append({"question": question_dict, "answer": answer_payload(answer)})
+
+    return {
+        "status": "ok",
+        "session_id": session_id,
+        "session_status": status,
+        "current_iteration": current_iteration,
+        "dialogue": dialogue,
+        "result": (
+            result_payload(result_message, requirement_id) if result_message else None
+        ),
+        "partial_result": None if result_message else partial_result,
+    }
@@ -0,0 +1,249 @@
+"""In-process stub of the external agent API used by the load test.
+
+Implements the endpoints ``AgentService`` calls and answers them the way the
+real agent does: synchronously with a small JSON body, then asynchronously by
+posting ``projectUpdated`` / ``questions`` / ``finalResult`` callbacks to the
+``callback_url`` it was given. With ``result_chunks`` the result is first
+streamed as that many ``resultChunk`` callbacks and ``finalResult`` carries none.
+"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, UTC
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Request, UploadFile, File, Form, status
+from fastapi.responses import JSONResponse
+
+
+class FakeSession:
+    def __init__(self, callback_url: str, project_id: Optional[str]):
+        self.id = str(uuid.uuid4())
+        self.callback_url = callback_url
+        self.project_id = project_id
+        self.iteration = 0
+        self.pending: Dict[str, bool] = {}
+        self.status = "WAITING_FOR_ANSWERS"
+        self.created_at = datetime.now(UTC)
+
+
+class FakeAgent:
+    def __init__(
+        self,
+        iterations: int = 2,
+        questions_per_iteration: int = 3,
+        callback_delay: float = 0.05,
+        result_size: int = 4000,
+        result_chunks: int = 0,
+    ):
+        self.iterations = iterations
+        self.questions_per_iteration = questions_per_iteration
+        self.callback_delay = callback_delay
+        self.result_size = result_size
+        self.result_chunks = result_chunks
+        self.sessions: Dict[str, FakeSession] = {}
+        self.projects: Dict[str, dict] = {}
+        self.client: Optional[httpx.AsyncClient] = None
+        self._tasks: set = set()
+
+    def _schedule(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _callback(self, url: str, event: str, data: dict, request_id: str):
+        await asyncio.sleep(self.callback_delay)
+        payload = {
+            "event": event,
+            "timestamp": datetime.now(UTC).isoformat(),
+            "data": data,
+        }
+        await self.client.post(url, json=payload, headers={"X-Request-ID": request_id})
+
+    def _session_dto(self, session: FakeSession, final_result: Optional[str]) -> dict:
+        now = datetime.now(UTC).isoformat()
+        return {
+            "session_id": session.id,
+            "project_id": session.project_id,
+            "session_status": session.status,
+            "iteration_number": session.iteration,
+            "final_result": final_result,
+            "created_at": session.created_at.isoformat(),
+            "updated_at": now,
+        }
+
+    async def _stream_result(
+        self, session: FakeSession, result: str, request_id: str
+    ) -> None:
+        size = -(-len(result) // self.result_chunks)
+        for index in range(self.result_chunks):
+            await self._callback(
+                session.callback_url,
+                "resultChunk",
+                {
+                    "session_id": session.id,
+                    "chunk_index": index,
+                    "content": result[index * size : (index + 1) * size],
+                },
+                request_id,
+            )
+        await self._callback(
+            session.callback_url,
+            "finalResult",
+            self._session_dto(session, None),
+            request_id,
+        )
+
+    def _next_iteration(self, session: FakeSession, request_id: str) -> None:
+        if session.iteration >= self.iterations:
+            session.status = "DONE"
+            body = "\n".join(
+                f"- Requirement {i}: the system shall do something useful."
+                for i in range(self.result_size // 60 + 1)
+            )
+            result = f"# Business requirements\n\n{body}"
+            if self.result_chunks:
+                self._schedule(self._stream_result(session, result, request_id))
+                return
+            self._schedule(
+                self._callback(
+                    session.callback_url,
+                    "finalResult",
+                    self._session_dto(session, result),
+                    request_id,
+                )
+            )
+            return
+
+        session.iteration += 1
+        questions: List[dict] = []
+        for number in range(1, self.questions_per_iteration + 1):
+            question_id = str(uuid.uuid4())
+            session.pending[question_id] = False
+            questions.append(
+                {
+                    "id": question_id,
+                    "question_number": number,
+                    "status": "unanswered",
+                    "question": f"Iteration {session.iteration}, question {number}?",
+                    "explanation": "Generated by the load-test agent stub",
+                }
+            )
+        data = {
+            "session_id": session.id,
+            "iteration_id": str(uuid.uuid4()),
+            "iteration_number": session.iteration,
+            "title": f"Iteration {session.iteration}",
+            "questions": questions,
+        }
+        self._schedule(
+            self._callback(session.callback_url, "questions", data, request_id)
+        )
+
+    def create_app(self) -> FastAPI:
+        agent = self
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            agent.client = httpx.AsyncClient(timeout=30)
+            yield
+            await agent.client.aclose()
+
+        app = FastAPI(title="Fake agent", lifespan=lifespan)
+
+        @app.get("/health")
+        async def health():
+            return {"status": "ok"}
+
+        @app.post("/projects")
+        async def create_project(
+            request: Request,
+            title: str = Form(...),
+            description: str = Form(...),
+            callback_url: str = Form(...),
+            files: List[UploadFile] = File(...),
+        ):
+            project_id = str(uuid.uuid4())
+            sizes = [len(await f.read()) for f in files]
+            project = {
+                "id": project_id,
+                "title": title,
+                "description": description,
+                "size": sum(sizes),
+                "files": [
+                    {"name": f.filename, "size": size} for f, size in zip(files, sizes)
+                ],
+            }
+            agent.projects[project_id] = project
+            agent._schedule(
+                agent._callback(
+                    callback_url,
+                    "projectUpdated",
+                    project,
+                    request.headers.get("X-Request-ID", project_id),
+                )
+            )
+            return project
+
+        @app.post("/projects/{project_id}")
+        async def add_files(
+            project_id: str,
+            request: Request,
+            callback_url: str = Form(...),
+            files: List[UploadFile] = File(...),
+        ):
+            project = agent.projects.get(project_id, {"id": project_id, "files": []})
+            for f in files:
+                project["files"].append(
+                    {"name": f.filename, "size": len(await f.read())}
+                )
+            return project
+
+        @app.delete("/projects/{project_id}")
+        async def delete_project(project_id: str):
+            agent.projects.pop(project_id, None)
+            return {"status": "deleted"}
+
+        @app.post("/interview-session", status_code=status.HTTP_202_ACCEPTED)
+        async def create_session(request: Request):
+            body = await request.json()
+            session = FakeSession(body["callback_url"], body.get("project_id"))
+            agent.sessions[session.id] = session
+            agent._next_iteration(
+                session, request.headers.get("X-Request-ID", session.id)
+            )
+            return {"session_id": session.id, "status": "accepted"}
+
+        @app.get("/interview-session/{session_id}")
+        async def session_status(session_id: str):
+            session = agent.sessions.get(session_id)
+            if session is None:
+                return JSONResponse({"detail": "not found"}, status_code=404)
+            return agent._session_dto(session, None)
+
+        @app.post(
+            "/interview-session/{session_id}/answer/{question_id}",
+            status_code=status.HTTP_202_ACCEPTED,
+        )
+        async def answer(session_id: str, question_id: str, request: Request):
+            session = agent.sessions.get(session_id)
+            if session is None or question_id not in session.pending:
+                return JSONResponse({"detail": "not found"}, status_code=404)
+            session.pending[question_id] = True
+            if all(session.pending.values()):
+                session.pending.clear()
+                agent._next_iteration(
+                    session, request.headers.get("X-Request-ID", question_id)
+                )
+            return {"status": "accepted"}
+
+        @app.post("/interview-session/{session_id}/cancel")
+        async def cancel(session_id: str):
+            session = agent.sessions.get(session_id)
+            if session is not None:
+                session.status = "CANCELLED"
+            return {"status": "cancelled"}
+
+        return app
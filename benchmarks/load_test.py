@@ -0,0 +1,288 @@
+"""Load test: scripted user journeys against a running API and a fake agent.
+
+Each journey registers a user, creates a project with files, starts an
+interview session on it, answers every question the agent asks (pushed as
+snapshots over ``/ws``) and exports the resulting requirements. Latencies are
+reported per endpoint template as p50/p95/p99 together with throughput.
+
+Until a session has its external id, the API matches agent webhooks to the
+latest project, so journeys create a project, wait for it to be linked and
+start its session one at a time; the interviews, matched by the external
+session id, run with the full ``--concurrency``.
+
+Start Postgres and the API with the agent pointed at the stub, then run::
+
+    docker-compose up -d postgres
+    EXTERNAL_API_URL=http://127.0.0.1:8090 \\
+    CALLBACK_URL=http://127.0.0.1:8080/agent/webhook \\
+        uv run api_start.py
+    uv run python -m benchmarks.load_test --journeys 20 --concurrency 5
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+import uvicorn
+import websockets
+
+from benchmarks.fake_agent import FakeAgent
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(
+        self, client: httpx.AsyncClient, method: str, name: str, url: str, **kwargs
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            raise RuntimeError(f"{name} -> {response.status_code}: {response.text}")
+        return response
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[index]
+
+
+async def wait_for(check, timeout: float, interval: float = 0.05):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = await check()
+        if result:
+            return result
+        await asyncio.sleep(interval)
+    raise TimeoutError("Timed out waiting for the agent callback")
+
+
+async def journey(
+    args, client: httpx.AsyncClient, recorder: Recorder, project_lock: asyncio.Lock
+):
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    tokens = (
+        await recorder.call(
+            client,
+            "POST",
+            "POST /auth/register",
+            "/auth/register",
+            json={
+                "email": email,
+                "password": "password123",
+                "display_name": "Load test",
+            },
+        )
+    ).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    files = [
+        (
+            "files",
+            (
+                f"brief_{i}.md",
+                b"# Brief\n" + b"Context line.\n" * 200,
+                "text/markdown",
+            ),
+        )
+        for i in range(args.files)
+    ]
+    async with project_lock:
+        project = (
+            await recorder.call(
+                client,
+                "POST",
+                "POST /projects",
+                "/projects",
+                headers=headers,
+                data={"title": f"Load {email}", "description": "Load test project"},
+                files=files,
+            )
+        ).json()
+
+        async def project_linked():
+            response = await recorder.call(
+                client,
+                "GET",
+                "GET /projects/{project_id}",
+                f"/projects/{project['id']}",
+                headers=headers,
+            )
+            return response.json().get("external_id")
+
+        await wait_for(project_linked, args.timeout)
+
+        agent_session = (
+            await recorder.call(
+                client,
+                "POST",
+                "POST /agent/sessions/start/project/{project_id}",
+                f"/agent/sessions/start/project/{project['id']}",
+                headers=headers,
+                json={"user_goal": "Describe the onboarding flow"},
+            )
+        ).json()
+    session_id = agent_session["id"]
+
+    ws_url = args.api_url.replace("http", "ws", 1) + "/ws"
+    async with websockets.connect(ws_url + f"?token={tokens['access_token']}") as ws:
+        deadline = time.monotonic() + args.timeout
+        subscribed = time.perf_counter()
+        await ws.send(json.dumps({"type": "subscribe", "session_id": session_id}))
+        first_snapshot = True
+        answered_at = None
+        answered = set()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Interview did not finish in time")
+            message = json.loads(await asyncio.wait_for(ws.recv(), remaining))
+            kind = message.get("type")
+            if kind == "ping":
+                await ws.send(json.dumps({"type": "pong"}))
+                continue
+            if kind == "error":
+                raise RuntimeError(f"WS error: {message.get('message')}")
+            if kind != "snapshot" or message.get("session_id") != session_id:
+                continue
+
+            if first_snapshot:
+                recorder.latencies["WS subscribe -> snapshot"].append(
+                    time.perf_counter() - subscribed
+                )
+                first_snapshot = False
+            if answered_at is not None:
+                recorder.latencies["WS answer -> snapshot"].append(
+                    time.perf_counter() - answered_at
+                )
+                answered_at = None
+
+            frame = message["snapshot"]
+            if frame["result"] and frame["result"]["requirement_id"]:
+                requirement_id = frame["result"]["requirement_id"]
+                break
+            pending = [d for d in frame["dialogue"] if d["answer"] is None]
+            if (
+                frame["result"]
+                or not pending
+                or frame["session_status"] != "waiting_for_answers"
+            ):
+                continue
+            question = pending[0]["question"]
+            if question["id"] in answered:
+                continue
+            answered.add(question["id"])
+            answered_at = time.perf_counter()
+            await recorder.call(
+                client,
+                "POST",
+                "POST /agent/sessions/{session_id}/answer/{question_id}",
+                f"/agent/sessions/{session_id}/answer/{question['id']}",
+                headers=headers,
+                json={
+                    "answer": f"Answer to {question['content']}",
+                    "is_skipped": False,
+                },
+            )
+
+    await recorder.call(
+        client,
+        "GET",
+        "GET /requirements/{requirements_id}/export",
+        f"/requirements/{requirement_id}/export",
+        headers=headers,
+        params={"file": "docx"},
+    )
+
+
+async def run(args):
+    agent = FakeAgent(
+        iterations=args.iterations,
+        questions_per_iteration=args.questions,
+        callback_delay=args.callback_delay,
+        result_chunks=args.result_chunks,
+    )
+    server = uvicorn.Server(
+        uvicorn.Config(
+            agent.create_app(),
+            host=args.agent_host,
+            port=args.agent_port,
+            log_level="warning",
+        )
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    project_lock = asyncio.Lock()
+    failures = 0
+
+    async def guarded(client):
+        nonlocal failures
+        async with semaphore:
+            try:
+                await journey(args, client, recorder, project_lock)
+            except Exception as e:
+                failures += 1
+                print(f"journey failed: {e}")
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(
+        base_url=args.api_url, timeout=args.timeout, limits=limits
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(guarded(client) for _ in range(args.journeys)))
+        elapsed = time.perf_counter() - started
+
+    server.should_exit = True
+    await server_task
+
+    total_requests = sum(len(v) for v in recorder.latencies.values())
+    completed = args.journeys - failures
+    print(
+        f"\n{completed}/{args.journeys} journeys in {elapsed:.2f}s "
+        f"({completed / elapsed:.2f} journeys/s, {total_requests / elapsed:.1f} req/s)\n"
+    )
+    print(
+        f"{'endpoint':<58}{'count':>7}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    for name, values in sorted(recorder.latencies.items()):
+        print(
+            f"{name:<58}{len(values):>7}{recorder.errors[name]:>8}"
+            f"{percentile(values, 0.50) * 1000:>9.1f}"
+            f"{percentile(values, 0.95) * 1000:>9.1f}"
+            f"{percentile(values, 0.99) * 1000:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--api-url", default="http://127.0.0.1:8080")
+    parser.add_argument("--agent-host", default="127.0.0.1")
+    parser.add_argument("--agent-port", type=int, default=8090)
+    parser.add_argument("--journeys", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=2)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--files", type=int, default=2)
+    parser.add_argument("--callback-delay", type=float, default=0.05)
+    parser.add_argument("--result-chunks", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Cold import time of the API with and without the export stack.
+
+``lazy`` is what a worker pays now; ``eager`` additionally imports
+WeasyPrint, python-docx and markdown the way ``app.services`` used to at
+import time. Each case runs in a fresh interpreter.
+
+    uv run python -m benchmarks.startup_time
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 7
+
+CASES = {
+    "lazy (import app.main)": "import app.main",
+    "eager (+ weasyprint, docx, markdown)": (
+        "import app.main, docx, markdown, weasyprint"
+    ),
+}
+
+
+def measure(code: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def main():
+    for name, code in CASES.items():
+        try:
+            timings = [measure(code) for _ in range(RUNS)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<40} failed: {e.stderr.decode().strip().splitlines()[-1]}")
+            continue
+        print(f"{name:<40} median {statistics.median(timings) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
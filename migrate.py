@@ -0,0 +1,4 @@
+from app.core.migrations import upgrade_to_head
+
+if __name__ == "__main__":
+    upgrade_to_head()